@@ -1,7 +1,8 @@
 import bpy
 from bpy_extras.io_utils import ImportHelper
-from bpy.props import BoolProperty, StringProperty, CollectionProperty, EnumProperty
+from bpy.props import BoolProperty, StringProperty, CollectionProperty, EnumProperty, IntProperty, FloatProperty
 from pathlib import Path
+import tempfile
 
 
 _translations = {
@@ -20,6 +21,52 @@ _translations = {
             "连接子骨骼",
         ("*", "Connect single-child bones to their parent (sets use_connect). Branching bones are unaffected."):
             "将单子骨骼连接到父骨骼（设置 use_connect）。分支骨骼不受影响。",
+        ("*", "Custom Normals"):
+            "自定义法线",
+        ("*", "Use the normals stored in the file as custom split normals instead of letting Blender recompute them"):
+            "使用文件中存储的法线作为自定义拆分法线，而不是由 Blender 重新计算",
+        ("*", "All Vertex Groups"):
+            "所有顶点组",
+        ("*", "Create a vertex group for every bone on every mesh, instead of only for the bones that mesh is weighted to"):
+            "为每个网格创建所有骨骼的顶点组，而不仅是该网格实际绑定的骨骼",
+        ("*", "Import LODs"):
+            "导入 LOD",
+        ("*", "Also import LOD and motion blur index buffers as meshes in separate collections excluded from the view layer"):
+            "同时将 LOD 和动态模糊索引缓冲区导入为网格，放入从视图层中排除的独立集合",
+        ("*", "Weld Vertices"):
+            "合并顶点",
+        ("*", "Merge vertices that were duplicated at UV seams and normal splits, keeping UVs per face corner"):
+            "合并在 UV 接缝和法线拆分处重复的顶点，并按面角保留 UV",
+        ("*", "Weld Distance"):
+            "合并距离",
+        ("*", "Positions are snapped to a grid with this spacing; vertices that land on the same grid point with the same bone weights are merged"):
+            "顶点位置会吸附到以该值为间距的网格上；落在同一网格点且骨骼权重相同的顶点会被合并",
+        ("*", "Binder Entries"):
+            "封包条目",
+        ("*", "Pattern of the entries imported from .chrbnd, .partsbnd and other binder files, e.g. *.flver or c1234_1.flver"):
+            "从 .chrbnd、.partsbnd 等封包文件中导入的条目的匹配模式，例如 *.flver 或 c1234_1.flver",
+        ("*", "Parallel Parsing"):
+            "并行解析",
+        ("*", "Parse multiple files in worker processes while the main thread builds the imported objects"):
+            "在工作进程中解析多个文件，同时由主线程创建导入的对象",
+        ("*", "Cache Parsed Files"):
+            "缓存解析结果",
+        ("*", "Store decoded mesh data on disk and reuse it when an unchanged file is imported again"):
+            "将解码后的网格数据存储到磁盘，再次导入未更改的文件时直接复用",
+        ("*", "Cache Size (MB)"):
+            "缓存大小 (MB)",
+        ("*", "Maximum disk space used by the cache; least recently used entries are removed first"):
+            "缓存使用的最大磁盘空间；最久未使用的条目会被优先删除",
+        ("*", "Write Profiling Report"):
+            "写入性能分析报告",
+        ("*", "Time every import stage and count vertices, faces and bones, then write a JSON report to the temporary directory"):
+            "统计每个导入阶段的耗时以及顶点、面和骨骼数量，并将 JSON 报告写入临时目录",
+        ("*", "Capture cProfile"):
+            "捕获 cProfile",
+        ("*", "Also run cProfile during the import and add the most expensive functions to the report"):
+            "导入期间同时运行 cProfile，并将耗时最多的函数添加到报告中",
+        ("*", "Profiling report written to {}"):
+            "性能分析报告已写入 {}",
     },
 }
 _translations["zh_HANS"] = _translations["zh_CN"]
@@ -31,7 +78,7 @@ class FLVER_OT_importer(bpy.types.Operator, ImportHelper):
     bl_options = {"REGISTER", "UNDO"}
 
     filter_glob: StringProperty(
-        default="*.flver",
+        default="*.flver;*.flver.dcx;*.*bnd;*.*bnd.dcx",
         options={"HIDDEN"}
     )
 
@@ -60,15 +107,120 @@ class FLVER_OT_importer(bpy.types.Operator, ImportHelper):
         default=True,
     )
 
+    custom_normals: BoolProperty(
+        name="Custom Normals",
+        description="Use the normals stored in the file as custom split "
+                    "normals instead of letting Blender recompute them",
+        default=True,
+    )
+
+    all_vertex_groups: BoolProperty(
+        name="All Vertex Groups",
+        description="Create a vertex group for every bone on every mesh, "
+                    "instead of only for the bones that mesh is weighted to",
+        default=False,
+    )
+
+    import_lods: BoolProperty(
+        name="Import LODs",
+        description="Also import LOD and motion blur index buffers as meshes "
+                    "in separate collections excluded from the view layer",
+        default=False,
+    )
+
+    weld_vertices: BoolProperty(
+        name="Weld Vertices",
+        description="Merge vertices that were duplicated at UV seams and "
+                    "normal splits, keeping UVs per face corner",
+        default=False,
+    )
+
+    weld_distance: FloatProperty(
+        name="Weld Distance",
+        description="Positions are snapped to a grid with this spacing; "
+                    "vertices that land on the same grid point with the same "
+                    "bone weights are merged",
+        default=0.0001,
+        min=0.0,
+        precision=5,
+        subtype="DISTANCE",
+    )
+
+    binder_pattern: StringProperty(
+        name="Binder Entries",
+        description="Pattern of the entries imported from .chrbnd, .partsbnd "
+                    "and other binder files, e.g. *.flver or c1234_1.flver",
+        default="*.flver",
+    )
+
+    parallel_import: BoolProperty(
+        name="Parallel Parsing",
+        description="Parse multiple files in worker processes while the main "
+                    "thread builds the imported objects",
+        default=False,
+    )
+
+    use_cache: BoolProperty(
+        name="Cache Parsed Files",
+        description="Store decoded mesh data on disk and reuse it when an "
+                    "unchanged file is imported again",
+        default=False,
+    )
+
+    cache_size: IntProperty(
+        name="Cache Size (MB)",
+        description="Maximum disk space used by the cache; least recently "
+                    "used entries are removed first",
+        default=2048,
+        min=16,
+    )
+
+    write_profile: BoolProperty(
+        name="Write Profiling Report",
+        description="Time every import stage and count vertices, faces and "
+                    "bones, then write a JSON report to the temporary directory",
+        default=False,
+    )
+
+    use_cprofile: BoolProperty(
+        name="Capture cProfile",
+        description="Also run cProfile during the import and add the most "
+                    "expensive functions to the report",
+        default=False,
+    )
+
     def execute(self, context):
-        from .importer import import_flver
+        from .importer import import_flvers
+        from .cache import MeshCache
+        from .profiling import ImportProfile
 
         z_up = (self.coordinate_system == 'Z_UP')
         connect_bones = self.connect_bones
 
-        for file in self.files:
-            file_path = Path(self.directory) / file.name
-            import_flver(file_path, z_up=z_up, connect_bones=connect_bones)
+        cache = None
+        if self.use_cache:
+            cache_directory = bpy.utils.extension_path_user(
+                __package__, path="mesh_cache", create=True)
+            cache = MeshCache(cache_directory, self.cache_size * 1024 * 1024)
+
+        profile = ImportProfile(enabled=self.write_profile,
+                                use_cprofile=self.use_cprofile)
+
+        file_paths = [Path(self.directory) / file.name for file in self.files]
+        import_flvers(file_paths, z_up=z_up, connect_bones=connect_bones,
+                      parallel=self.parallel_import, cache=cache,
+                      all_vertex_groups=self.all_vertex_groups, profile=profile,
+                      import_lods=self.import_lods,
+                      weld_distance=self.weld_distance if self.weld_vertices else None,
+                      custom_normals=self.custom_normals,
+                      binder_pattern=self.binder_pattern)
+
+        if self.write_profile:
+            report_path = profile.write_report(
+                Path(tempfile.gettempdir()) / "flver_import_profiles")
+            print(f"Profiling report written to {report_path}")
+            self.report({"INFO"}, bpy.app.translations.pgettext_rpt(
+                "Profiling report written to {}").format(report_path))
 
         return {"FINISHED"}
 
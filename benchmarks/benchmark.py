@@ -0,0 +1,161 @@
+"""
+Benchmark FLVER parsing and decoding without Blender.
+
+Synthetic FLVER files are generated for every combination of the requested
+versions and index buffer modes, then each stage of loading is timed on its
+own: parsing the file, decoding vertex buffers, decoding index buffers,
+computing bone matrices, and the full inflate, both from scratch and with
+the vertex buffers already decoded. Every stage reports its best time over
+several runs, throughput in vertices per second, and peak memory allocated
+while it runs.
+
+Usage:
+    python benchmarks/benchmark.py --vertices 200000 --meshes 4 --strip both
+"""
+import argparse
+import importlib
+import importlib.machinery
+import importlib.util
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+from synthetic_flver import LAYOUTS, VERSIONS, build_flver
+
+ADDON_DIRECTORY = Path(__file__).resolve().parent.parent
+PACKAGE_NAME = "io_import_flver"
+
+
+def load_addon():
+    """
+    Import the add-on's parsing modules outside of Blender.
+
+    The add-on's __init__ needs bpy, so the package is registered without
+    running it and only the bpy-free modules are imported.
+    """
+    spec = importlib.machinery.ModuleSpec(PACKAGE_NAME, None, is_package=True)
+    spec.submodule_search_locations = [str(ADDON_DIRECTORY)]
+    sys.modules[PACKAGE_NAME] = importlib.util.module_from_spec(spec)
+    flver = importlib.import_module(PACKAGE_NAME + ".flver")
+    flver_utils = importlib.import_module(PACKAGE_NAME + ".flver_utils")
+    return flver, flver_utils
+
+
+def measure(function, repeat):
+    """
+    Run a function several times.
+
+    Returns:
+        tuple: (best time in seconds, peak traced memory in bytes)
+    """
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+
+    # Measure memory in a separate run, as tracing slows the code down
+    tracemalloc.start()
+    function()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best, peak
+
+
+def benchmark_file(flver, flver_utils, file_path, repeat):
+    """
+    Time every loading stage of one file.
+
+    Returns:
+        list: (stage name, best time, peak memory) for every stage.
+    """
+    flver_data = flver_utils.read_flver(file_path)
+    version = flver_data.header.version
+    byte_order = flver_data.header.endianness.byte_order
+
+    def decode_vertices():
+        for vertex_buffer in flver_data.vertex_buffers:
+            vertex_buffer._inflate(
+                vertices=flver.InflatedMesh.Vertices(),
+                struct=flver_data.vertex_buffer_structs[vertex_buffer.struct_index],
+                version=version,
+                byte_order=byte_order)
+
+    def decode_indices():
+        for index_buffer in flver_data.index_buffers:
+            index_buffer._inflate()
+
+    def inflate():
+        # Decoded vertex buffers are memoized per Flver, so start from scratch
+        flver_data._decoded_vertex_buffers.clear()
+        flver_data.inflate()
+
+    stages = [
+        ("scan (lazy)", lambda: flver_utils.read_flver(file_path, lazy=True)),
+        ("read_flver", lambda: flver_utils.read_flver(file_path)),
+        ("decode vertices", decode_vertices),
+        ("decode indices", decode_indices),
+        ("bone matrices", flver_data.bone_world_matrices),
+        ("inflate", inflate),
+        ("inflate (decoded)", flver_data.inflate),
+        ("read + inflate", lambda: flver_utils.read_flver(file_path).inflate()),
+    ]
+    return [(name, *measure(function, repeat)) for name, function in stages]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--versions", default="0x2000C,0x20014,0x20021",
+                        help="comma separated FLVER versions, or 'all'")
+    parser.add_argument("--vertices", type=int, default=100000,
+                        help="vertices per mesh")
+    parser.add_argument("--meshes", type=int, default=4)
+    parser.add_argument("--bones", type=int, default=200)
+    parser.add_argument("--layout", choices=sorted(LAYOUTS), default="packed")
+    parser.add_argument("--strip", choices=["list", "strip", "both"],
+                        default="both", help="index buffer primitive mode")
+    parser.add_argument("--big-endian", action="store_true")
+    parser.add_argument("--lods", action="store_true",
+                        help="add LOD and motion blur index buffers")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    if args.versions == "all":
+        versions = VERSIONS
+    else:
+        versions = [int(version, 0) for version in args.versions.split(",")]
+    strip_modes = {"list": [False], "strip": [True], "both": [False, True]}[args.strip]
+
+    flver, flver_utils = load_addon()
+    total_vertices = args.vertices * args.meshes
+
+    with tempfile.TemporaryDirectory() as directory:
+        for version in versions:
+            for strip in strip_modes:
+                file_path = Path(directory) / f"{version:x}_{int(strip)}.flver"
+                file_path.write_bytes(build_flver(
+                    version=version,
+                    mesh_count=args.meshes,
+                    vertex_count=args.vertices,
+                    strip=strip,
+                    layout=args.layout,
+                    bone_count=args.bones,
+                    big_endian=args.big_endian,
+                    lods=args.lods,
+                ))
+
+                print(f"\nversion 0x{version:X}, {'strip' if strip else 'list'}, "
+                      f"{args.layout} layout, {args.meshes} x {args.vertices} vertices, "
+                      f"{args.bones} bones, {file_path.stat().st_size / 2**20:.1f} MiB")
+                print(f"{'stage':<18}{'time (ms)':>12}{'vertices/s':>16}{'peak (MiB)':>14}")
+                for name, seconds, peak in benchmark_file(flver, flver_utils,
+                                                          file_path, args.repeat):
+                    throughput = total_vertices / seconds if seconds > 0 else float("inf")
+                    print(f"{name:<18}{seconds * 1000:>12.2f}{throughput:>16,.0f}"
+                          f"{peak / 2**20:>14.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,315 @@
+"""
+Writer for synthetic FLVER files used by the benchmarks.
+
+The generated files are structurally valid FLVER2 files with random geometry:
+a bone hierarchy, one material, texture and vertex buffer per mesh, and one
+index buffer per mesh (plus optional LOD and motion blur index buffers). The
+writer deliberately does not reuse the importer's tables, so that it can be
+used to check the reader.
+"""
+import struct
+
+import numpy as np
+
+# Vertex buffer struct member data types: code, NumPy type, component count.
+DATA_TYPES = {
+    "FLOAT2": (0x01, "f4", 2),
+    "FLOAT3": (0x02, "f4", 3),
+    "FLOAT4": (0x03, "f4", 4),
+    "COLOR": (0x10, "u1", 4),
+    "UBYTE4": (0x11, "u1", 4),
+    "BYTE4": (0x12, "i1", 4),
+    "UBYTE4_NORM": (0x13, "u1", 4),
+    "BYTE4_NORM": (0x14, "i1", 4),
+    "SHORT2": (0x15, "i2", 2),
+    "SHORT4": (0x16, "i2", 4),
+    "USHORT2": (0x17, "u2", 2),
+    "USHORT4": (0x18, "u2", 4),
+    "SHORT4_NORM": (0x1A, "i2", 4),
+    "HALF2": (0x2D, "f2", 2),
+    "HALF4": (0x2E, "f2", 4),
+}
+
+ATTRIBUTE_TYPES = {
+    "POSITION": 0,
+    "BONE_WEIGHTS": 1,
+    "BONE_INDICES": 2,
+    "NORMAL": 3,
+    "UV": 5,
+    "TANGENT": 6,
+    "BITANGENT": 7,
+    "VERTEX_COLOR": 10,
+}
+
+# Vertex struct layouts as (attribute type, data type, index) members, loosely
+# modelled on the layouts of the games.
+LAYOUTS = {
+    # Full precision floats, byte normals (DS1 / DS2 style)
+    "float": [
+        ("POSITION", "FLOAT3", 0),
+        ("NORMAL", "UBYTE4", 0),
+        ("BONE_INDICES", "UBYTE4", 0),
+        ("BONE_WEIGHTS", "UBYTE4_NORM", 0),
+        ("VERTEX_COLOR", "UBYTE4_NORM", 0),
+        ("UV", "FLOAT2", 0),
+    ],
+    # Packed normals, short UVs with a second UV pair (DS3 / Elden Ring style)
+    "packed": [
+        ("POSITION", "FLOAT3", 0),
+        ("BONE_WEIGHTS", "SHORT4_NORM", 0),
+        ("BONE_INDICES", "UBYTE4", 0),
+        ("NORMAL", "BYTE4_NORM", 0),
+        ("TANGENT", "BYTE4_NORM", 0),
+        ("UV", "SHORT2", 0),
+        ("UV", "SHORT4", 1),
+        ("VERTEX_COLOR", "COLOR", 0),
+    ],
+    # Short bone indices for large skeletons
+    "ushort": [
+        ("POSITION", "FLOAT3", 0),
+        ("BONE_INDICES", "USHORT4", 0),
+        ("BONE_WEIGHTS", "SHORT4_NORM", 0),
+        ("NORMAL", "SHORT4_NORM", 0),
+        ("UV", "USHORT2", 0),
+    ],
+    # Positions only, for measuring raw buffer throughput
+    "position": [
+        ("POSITION", "FLOAT3", 0),
+    ],
+}
+
+VERSIONS = [
+    0x2000C, 0x2000D, 0x2000E, 0x2000F, 0x20010, 0x20013, 0x20014, 0x20016,
+    0x20017, 0x2001A, 0x2001B, 0x20021
+]
+
+HEADER_SIZE = 0x80
+DUMMY_SIZE = 0x40
+MATERIAL_SIZE = 0x20
+BONE_SIZE = 0x80
+MESH_SIZE = 0x30
+VERTEX_BUFFER_SIZE = 0x20
+VERTEX_BUFFER_STRUCT_SIZE = 0x10
+TEXTURE_SIZE = 0x20
+
+LOD_FLAGS = [0x01000000, 0x02000000, 0x80000000]
+
+
+def random_vertices(rng, layout, vertex_count, bone_count, byte_order):
+    """
+    Create random vertex data for a struct layout.
+
+    Returns:
+        tuple: (buffer bytes, struct size)
+    """
+    names = []
+    formats = []
+    for i, (_, data_type, _) in enumerate(layout):
+        _, numpy_type, count = DATA_TYPES[data_type]
+        names.append(f"m{i}")
+        formats.append((byte_order + numpy_type, (count, )))
+    records = np.zeros(vertex_count, dtype=np.dtype({
+        "names": names,
+        "formats": formats
+    }))
+
+    for i, (attribute_type, data_type, _) in enumerate(layout):
+        field = records[f"m{i}"]
+        if attribute_type == "BONE_INDICES":
+            field[:] = rng.integers(0, bone_count, size=field.shape)
+        elif field.dtype.kind == "f":
+            field[:] = rng.uniform(-2.0, 2.0, size=field.shape)
+        else:
+            info = np.iinfo(field.dtype)
+            field[:] = rng.integers(info.min, info.max, size=field.shape,
+                                    endpoint=True)
+    return records.tobytes(), records.dtype.itemsize
+
+
+def random_indices(rng, vertex_count, triangle_count, strip):
+    """
+    Create random triangle list or triangle strip indices. Strips contain
+    occasional repeated indices, which produce degenerate triangles.
+    """
+    if not strip:
+        return rng.integers(0, vertex_count, size=triangle_count * 3)
+    indices = rng.integers(0, vertex_count, size=triangle_count + 2)
+    repeats = np.flatnonzero(rng.random(len(indices) - 1) < 0.05) + 1
+    indices[repeats] = indices[repeats - 1]
+    return indices
+
+
+class _Blob:
+    """Growing byte buffer for data referenced by offset."""
+
+    def __init__(self, base_offset):
+        self.base_offset = base_offset
+        self.data = bytearray()
+
+    def add(self, data, alignment=4):
+        offset = self.base_offset + len(self.data)
+        self.data.extend(data)
+        self.align(alignment)
+        return offset
+
+    def align(self, alignment):
+        while (self.base_offset + len(self.data)) % alignment:
+            self.data.append(0)
+        return self.base_offset + len(self.data)
+
+
+def build_flver(version=0x20014, mesh_count=1, vertex_count=10000,
+                strip=False, layout="packed", bone_count=100,
+                big_endian=False, unicode=True, lods=False, seed=0):
+    """
+    Build a synthetic FLVER file.
+
+    Args:
+        version (int): FLVER version written to the header.
+        mesh_count (int): Number of meshes.
+        vertex_count (int): Number of vertices per mesh.
+        strip (bool): Write triangle strips instead of triangle lists.
+        layout (str): Name of the vertex struct layout in LAYOUTS.
+        bone_count (int): Number of bones in the skeleton.
+        big_endian (bool): Write a big-endian file.
+        unicode (bool): Write strings as UTF-16 instead of Shift-JIS.
+        lods (bool): Add LOD and motion blur index buffers to every mesh.
+        seed (int): Random seed.
+
+    Returns:
+        bytes: The FLVER file contents.
+    """
+    rng = np.random.default_rng(seed)
+    byte_order = ">" if big_endian else "<"
+    members = LAYOUTS[layout]
+    index_size = 16 if vertex_count <= 0x10000 else 32
+    index_type = byte_order + ("u2" if index_size == 16 else "u4")
+
+    def pack(fmt, *values):
+        return struct.pack(byte_order + fmt, *values)
+
+    def encode(text):
+        if unicode:
+            encoding = "utf_16_be" if big_endian else "utf_16_le"
+            return text.encode(encoding) + b"\0\0"
+        return text.encode("shift_jis") + b"\0"
+
+    # Vertex and index data, relative to the data offset
+    data = _Blob(0)
+    vertex_buffers = []
+    index_buffers = []
+    struct_size = 0
+    for _ in range(mesh_count):
+        buffer_data, struct_size = random_vertices(rng, members, vertex_count,
+                                                   bone_count, byte_order)
+        vertex_buffers.append((vertex_count, len(buffer_data),
+                               data.add(buffer_data, 16)))
+        for flags in [0] + (LOD_FLAGS if lods else []):
+            indices = random_indices(rng, vertex_count, vertex_count * 2,
+                                     strip)
+            index_data = indices.astype(index_type).tobytes()
+            index_buffers.append((flags, len(indices), len(index_data),
+                                  data.add(index_data, 16)))
+    index_buffers_per_mesh = len(index_buffers) // max(mesh_count, 1)
+
+    index_buffer_size = 0x20 if version > 0x20005 else 0x10
+    sections_end = (HEADER_SIZE + DUMMY_SIZE + MATERIAL_SIZE * mesh_count +
+                    BONE_SIZE * bone_count + MESH_SIZE * mesh_count +
+                    index_buffer_size * len(index_buffers) +
+                    VERTEX_BUFFER_SIZE * len(vertex_buffers) +
+                    VERTEX_BUFFER_STRUCT_SIZE + TEXTURE_SIZE * mesh_count)
+    extra = _Blob(sections_end)
+
+    dummies = pack("fffBBBBfffHhfffh??IIII", 0.0, 1.0, 0.0, 255, 255, 255,
+                   255, 0.0, 0.0, 1.0, 100, -1, 0.0, 1.0, 0.0, -1, False,
+                   True, 0, 0, 0, 0)
+
+    materials = b""
+    for i in range(mesh_count):
+        name_offset = extra.add(encode(f"Material_{i}"))
+        mtd_offset = extra.add(encode(f"N:\\Material\\mtd\\material_{i}.mtd"))
+        materials += pack("IIIIIIII", name_offset, mtd_offset, 1, i, 0, 0, 0,
+                          0)
+
+    # Random bone tree where each bone's parent is one of the previous few
+    # bones, which gives a mix of long chains and branches.
+    parents = [-1] + [
+        int(rng.integers(max(0, i - 3), i)) for i in range(1, bone_count)
+    ]
+    children = [[] for _ in range(bone_count)]
+    roots = []
+    for i, parent in enumerate(parents):
+        (children[parent] if parent >= 0 else roots).append(i)
+    bones = b""
+    for i in range(bone_count):
+        siblings = children[parents[i]] if parents[i] >= 0 else roots
+        position = siblings.index(i)
+        next_sibling = siblings[position + 1] if position + 1 < len(siblings) else -1
+        previous_sibling = siblings[position - 1] if position > 0 else -1
+        child = children[i][0] if children[i] else -1
+        name_offset = extra.add(encode(f"Bone_{i}"))
+        translation = rng.uniform(-0.5, 0.5, size=3)
+        rotation = rng.uniform(-np.pi, np.pi, size=3)
+        bones += pack("fffIfffhhfffhhfffIfff", *translation, name_offset,
+                      *rotation, parents[i], child, 1.0, 1.0, 1.0,
+                      next_sibling, previous_sibling, -1.0, -1.0, -1.0, 0,
+                      1.0, 1.0, 1.0) + b"\0" * 0x34
+
+    meshes = b""
+    for i in range(mesh_count):
+        bone_indices = list(range(min(bone_count, 28)))
+        bone_offset = extra.add(pack("I" * len(bone_indices), *bone_indices))
+        index_buffer_indices = list(
+            range(i * index_buffers_per_mesh,
+                  (i + 1) * index_buffers_per_mesh))
+        index_buffer_offset = extra.add(
+            pack("I" * len(index_buffer_indices), *index_buffer_indices))
+        vertex_buffer_offset = extra.add(pack("I", i))
+        meshes += pack("BBBBIIIIIIIIIII", 1, 0, 0, 0, i, 0, 0,
+                       len(bone_indices), len(bone_indices), 0, bone_offset,
+                       len(index_buffer_indices), index_buffer_offset, 1,
+                       vertex_buffer_offset)
+
+    index_buffer_headers = b""
+    for flags, index_count, length, offset in index_buffers:
+        index_buffer_headers += pack("IBBHII", flags, 1 if strip else 0, 1,
+                                     0, index_count, offset)
+        if version > 0x20005:
+            index_buffer_headers += pack("IIII", length, 0, index_size, 0)
+
+    vertex_buffer_headers = b""
+    for count, length, offset in vertex_buffers:
+        vertex_buffer_headers += pack("IIIIIIII", 0, 0, struct_size, count, 0,
+                                      0, length, offset)
+
+    member_data = b""
+    struct_offset = 0
+    for attribute_type, data_type, index in members:
+        code, numpy_type, count = DATA_TYPES[data_type]
+        member_data += pack("IIIII", 0, struct_offset, code,
+                            ATTRIBUTE_TYPES[attribute_type], index)
+        struct_offset += np.dtype(numpy_type).itemsize * count
+    vertex_buffer_struct = pack("IIII", len(members), 0, 0,
+                                extra.add(member_data))
+
+    textures = b""
+    for i in range(mesh_count):
+        path_offset = extra.add(encode(f"N:\\Material\\tex\\texture_{i}_a.tif"))
+        type_offset = extra.add(encode("g_DiffuseTexture"))
+        textures += pack("IIffB?BBfff", path_offset, type_offset, 1.0, 1.0, 1,
+                         True, 0, 0, 0.0, 0.0, 0.0)
+
+    data_offset = extra.align(16)
+    header = b"FLVER\0" + (b"B\0" if big_endian else b"L\0")
+    header += pack("IIIIIIIIffffffIIBB?BIIIIBBBBIIIIIIII", version,
+                   data_offset, len(data.data), 1, mesh_count, bone_count,
+                   mesh_count, len(vertex_buffers), -1.0, -1.0, -1.0, 1.0,
+                   1.0, 1.0, 0, 0, index_size, 1 if unicode else 0, True, 0,
+                   0, len(index_buffers), 1, mesh_count, 0, 0, 0, 0, 0, 0, 0,
+                   0, 0, 0, 0, 0)
+
+    body = (header + dummies + materials + bones + meshes +
+            index_buffer_headers + vertex_buffer_headers +
+            vertex_buffer_struct + textures)
+    assert len(body) == sections_end
+    return body + bytes(extra.data) + bytes(data.data)
@@ -0,0 +1,294 @@
+import fnmatch
+import mmap
+import struct
+
+from . import dcx
+
+BND3_MAGIC = b"BND3"
+BND4_MAGIC = b"BND4"
+
+# Binder format flags, after normalizing the bit order of the format byte
+FORMAT_BIG_ENDIAN = 0x01
+FORMAT_IDS = 0x02
+FORMAT_NAMES1 = 0x04
+FORMAT_NAMES2 = 0x08
+FORMAT_LONG_OFFSETS = 0x10
+FORMAT_COMPRESSION = 0x20
+FORMAT_FLAG7 = 0x80
+
+# Entry flag of compressed entries, whose data is a DCX container
+FILE_COMPRESSED = 0x01
+
+# Bytes searched for the terminator of an entry name before the window grows
+NAME_SEARCH_WINDOW = 0x100
+
+
+class BinderEntry:
+    """
+    One file stored in a binder.
+
+    Args:
+        id (int): Entry ID, or -1 if the binder has no IDs.
+        name (str): Full name of the entry, usually a Windows path.
+        flags (int): Entry flags with their bits in the normalized order.
+        offset (int): Offset of the entry data in the binder.
+        size (int): Size of the stored (possibly compressed) data.
+        uncompressed_size (int): Size after decompression, or -1 if unknown.
+    """
+
+    __slots__ = ("id", "name", "flags", "offset", "size", "uncompressed_size")
+
+    def __init__(self, id, name, flags, offset, size, uncompressed_size):
+        self.id = id
+        self.name = name
+        self.flags = flags
+        self.offset = offset
+        self.size = size
+        self.uncompressed_size = uncompressed_size
+
+    @property
+    def file_name(self):
+        """Name of the entry without its directories."""
+        return self.name.replace("\\", "/").rsplit("/", 1)[-1]
+
+
+class Binder:
+    """
+    File table of a BND3 or BND4 binder over its in-memory data.
+
+    The table is parsed once into an index from entry name to entry; the
+    data of an entry is only touched when it is read, and uncompressed
+    entries are returned as slices of the binder buffer without copying.
+
+    Args:
+        buffer: bytes-like object holding the whole (decompressed) binder.
+        entries (list): BinderEntry of every file in the binder.
+    """
+
+    def __init__(self, buffer, entries):
+        self.buffer = buffer
+        self.entries = entries
+        self.index = {}
+        for entry in entries:
+            self.index.setdefault(entry.name, entry)
+
+    def find(self, pattern):
+        """
+        Entries whose file name matches a pattern.
+
+        Args:
+            pattern (str): fnmatch style pattern such as "*.flver", matched
+                           case-insensitively against the file name.
+
+        Returns:
+            list: Matching entries in binder order.
+        """
+        pattern = pattern.lower()
+        return [entry for entry in self.entries
+                if fnmatch.fnmatchcase(entry.file_name.lower(), pattern)]
+
+    def read(self, name):
+        """
+        Data of an entry.
+
+        Args:
+            name (str): Full name of the entry.
+
+        Returns:
+            memoryview slice of the binder for uncompressed entries, or a
+            bytearray with the decompressed data for DCX compressed ones.
+        """
+        entry = self.index.get(name)
+        if entry is None:
+            raise Exception(f"binder has no entry named {name!r}")
+        data = memoryview(self.buffer)[entry.offset:entry.offset + entry.size]
+        if entry.flags & FILE_COMPRESSED or dcx.is_dcx(data):
+            return dcx.decompress_dcx(data)
+        return data
+
+
+def is_binder(buffer):
+    """
+    Check whether a buffer holds a BND3 or BND4 binder.
+
+    Args:
+        buffer: bytes-like object with the start of the file.
+    """
+    return bytes(buffer[:4]) in {BND3_MAGIC, BND4_MAGIC}
+
+
+def is_binder_name(file_name):
+    """
+    Guess from its name whether a file is a binder, e.g. c1234.chrbnd.dcx.
+
+    Args:
+        file_name (str): Name of the file.
+    """
+    name = str(file_name).lower()
+    if name.endswith(".dcx"):
+        name = name[:-len(".dcx")]
+    return name.endswith("bnd")
+
+
+def _reverse_bits(value):
+    return int(f"{value:08b}"[::-1], 2)
+
+
+# The format byte is stored either as is or with its bits reversed; little
+# endian binders with the bit order flag unset use the reversed form.
+def _read_format(raw_format, bit_big_endian):
+    reverse = bit_big_endian or (raw_format & 0x01 and not raw_format & 0x80)
+    return raw_format if reverse else _reverse_bits(raw_format)
+
+
+def _read_file_flags(raw_flags, bit_big_endian, format):
+    reverse = bit_big_endian or (format & FORMAT_BIG_ENDIAN and not format & FORMAT_FLAG7)
+    return raw_flags if reverse else _reverse_bits(raw_flags)
+
+
+# Offset of the terminator of the name at start, searched in a window that
+# grows until the end of the buffer. UTF-16 terminators must be aligned to
+# the start of the name.
+def _find_terminator(buffer, start, terminator):
+    if not 0 <= start < len(buffer):
+        raise Exception(f"binder entry name offset {start:#x} is out of range")
+    window = NAME_SEARCH_WINDOW
+    while True:
+        chunk = bytes(buffer[start:start + window])
+        end = chunk.find(terminator)
+        while end > 0 and end % len(terminator):
+            end = chunk.find(terminator, end + 1)
+        if end >= 0:
+            return start + end
+        if start + window >= len(buffer):
+            raise Exception(f"unterminated binder entry name at offset {start:#x}")
+        window *= 4
+
+
+def _read_name(buffer, offset, unicode, byte_order):
+    if unicode:
+        terminator = b"\0\0"
+        encoding = "utf_16_be" if byte_order == ">" else "utf_16_le"
+    else:
+        terminator = b"\0"
+        encoding = "shift_jis"
+    end = _find_terminator(buffer, offset, terminator)
+    return str(buffer[offset:end], encoding=encoding)
+
+
+def _read_entry(buffer, offset, byte_order, format, bit_big_endian, unicode, bnd4):
+    flags = _read_file_flags(buffer[offset], bit_big_endian, format)
+    offset += 4
+    uncompressed_size = -1
+    if bnd4:
+        offset += 4  # -1
+        size, = struct.unpack_from(byte_order + "q", buffer, offset)
+        offset += 8
+        if format & FORMAT_COMPRESSION:
+            uncompressed_size, = struct.unpack_from(byte_order + "q", buffer, offset)
+            offset += 8
+    else:
+        size, = struct.unpack_from(byte_order + "i", buffer, offset)
+        offset += 4
+
+    if format & FORMAT_LONG_OFFSETS:
+        data_offset, = struct.unpack_from(byte_order + "q", buffer, offset)
+        offset += 8
+    else:
+        data_offset, = struct.unpack_from(byte_order + "I", buffer, offset)
+        offset += 4
+
+    entry_id = -1
+    if format & FORMAT_IDS:
+        entry_id, = struct.unpack_from(byte_order + "i", buffer, offset)
+        offset += 4
+
+    name = None
+    if format & (FORMAT_NAMES1 | FORMAT_NAMES2):
+        name_offset, = struct.unpack_from(byte_order + "I", buffer, offset)
+        offset += 4
+        name = _read_name(buffer, name_offset, unicode, byte_order)
+
+    if not bnd4 and format & FORMAT_COMPRESSION:
+        uncompressed_size, = struct.unpack_from(byte_order + "i", buffer, offset)
+
+    if name is None:
+        name = str(entry_id)
+    return BinderEntry(entry_id, name, flags, data_offset, size, uncompressed_size)
+
+
+def parse_binder(buffer):
+    """
+    Parse the file table of a BND3 or BND4 binder.
+
+    Args:
+        buffer: bytes-like object holding the whole decompressed binder.
+
+    Returns:
+        Binder: The binder with its entry index.
+    """
+    magic = bytes(buffer[:4])
+    if magic == BND3_MAGIC:
+        # Version string at 0x4, format at 0xC, endianness flags at 0xD and
+        # 0xE; the file headers start at 0x20 and have no stored size.
+        bit_big_endian = bool(buffer[0xE])
+        format = _read_format(buffer[0xC], bit_big_endian)
+        big_endian = bool(buffer[0xD]) or bool(format & FORMAT_BIG_ENDIAN)
+        byte_order = ">" if big_endian else "<"
+        file_count, = struct.unpack_from(byte_order + "i", buffer, 0x10)
+        header_offset = 0x20
+        header_size = 0x0C
+        if format & FORMAT_LONG_OFFSETS:
+            header_size += 4
+        if format & FORMAT_IDS:
+            header_size += 4
+        if format & (FORMAT_NAMES1 | FORMAT_NAMES2):
+            header_size += 4
+        if format & FORMAT_COMPRESSION:
+            header_size += 4
+        unicode = False
+        bnd4 = False
+    elif magic == BND4_MAGIC:
+        # Endianness flags at 0x9 and 0xA, file count at 0xC, the size of a
+        # file header at 0x20 and the format at 0x31; headers start at 0x40.
+        big_endian = bool(buffer[0x9])
+        bit_big_endian = not buffer[0xA]
+        byte_order = ">" if big_endian else "<"
+        file_count, = struct.unpack_from(byte_order + "i", buffer, 0xC)
+        header_size, = struct.unpack_from(byte_order + "q", buffer, 0x20)
+        unicode = bool(buffer[0x30])
+        format = _read_format(buffer[0x31], bit_big_endian)
+        header_offset = 0x40
+        bnd4 = True
+    else:
+        raise Exception(f"not a BND3 or BND4 binder (magic {magic!r})")
+
+    entries = [
+        _read_entry(buffer, header_offset + i * header_size, byte_order, format,
+                    bit_big_endian, unicode, bnd4)
+        for i in range(file_count)
+    ]
+    return Binder(buffer, entries)
+
+
+def read_binder(file_name):
+    """
+    Map a binder file and parse its file table.
+
+    DCX compressed binders are decompressed into memory first; otherwise the
+    entries are slices of the memory mapped file.
+
+    Args:
+        file_name (Path): Path to the binder, e.g. c1234.chrbnd.dcx.
+
+    Returns:
+        Binder: The binder with its entry index.
+    """
+    with open(file_name, 'rb') as fp:
+        buffer = mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ)
+
+    if dcx.is_dcx(buffer):
+        compressed = buffer
+        buffer = dcx.decompress_dcx(compressed)
+        compressed.close()
+    return parse_binder(buffer)
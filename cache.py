@@ -0,0 +1,109 @@
+import hashlib
+import os
+import pickle
+import tempfile
+from pathlib import Path
+
+# Bump whenever the layout or decoded content of Flver or InflatedMesh
+# changes, so entries written by an older version are never loaded.
+CACHE_VERSION = 8
+
+CACHE_SUFFIX = ".flvercache"
+
+
+class MeshCache:
+    """
+    On-disk cache of parsed and inflated FLVER files.
+
+    Entries are keyed on the resolved path, size and modification time of the
+    source file and on the options it was loaded with, so editing or
+    replacing a file invalidates its entry. The
+    total size of the cache is bounded; when it grows past max_size, the
+    least recently used entries are removed first.
+
+    Args:
+        directory (Path): Directory holding the cache entries.
+        max_size (int): Maximum total size of all entries in bytes.
+    """
+
+    def __init__(self, directory, max_size):
+        self.directory = Path(directory)
+        self.max_size = max_size
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def _entry_path(self, file_path, options):
+        file_path = Path(file_path).resolve()
+        stat = file_path.stat()
+        key = f"{CACHE_VERSION}\0{file_path}\0{stat.st_size}\0{stat.st_mtime_ns}"
+        for name, value in sorted(options.items()):
+            key += f"\0{name}={value!r}"
+        digest = hashlib.sha1(key.encode("utf-8")).hexdigest()
+        return self.directory / (digest + CACHE_SUFFIX)
+
+    def get(self, file_path, options=None):
+        """
+        Look up a file in the cache.
+
+        Args:
+            file_path (Path): Path to the .flver file.
+            options (dict): Options the file was loaded with.
+
+        Returns:
+            tuple: (flver_data, inflated_meshes), or None on a cache miss.
+        """
+        entry_path = self._entry_path(file_path, options or {})
+        try:
+            with open(entry_path, "rb") as fp:
+                flver_data, inflated_meshes = pickle.load(fp)
+        except FileNotFoundError:
+            return None
+        except Exception as error:
+            print(f"Warning: discarding unreadable cache entry {entry_path.name} ({error})")
+            entry_path.unlink(missing_ok=True)
+            return None
+
+        # Mark the entry as recently used
+        os.utime(entry_path)
+        return flver_data, inflated_meshes
+
+    def put(self, file_path, flver_data, inflated_meshes, options=None):
+        """
+        Store a loaded file in the cache and evict old entries if needed.
+
+        Args:
+            file_path (Path): Path to the .flver file.
+            flver_data (Flver): Parsed FLVER data with its buffers released.
+            inflated_meshes (list): Result of flver_data.inflate().
+            options (dict): Options the file was loaded with.
+        """
+        entry_path = self._entry_path(file_path, options or {})
+
+        # Write to a temporary file first, so a partially written entry is
+        # never picked up.
+        fd, temp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as fp:
+                pickle.dump((flver_data, inflated_meshes), fp,
+                            protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temp_path, entry_path)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+
+        self._evict()
+
+    def _evict(self):
+        entries = []
+        for entry_path in self.directory.glob("*" + CACHE_SUFFIX):
+            try:
+                stat = entry_path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime_ns, stat.st_size, entry_path))
+
+        total_size = sum(size for _, size, _ in entries)
+        for _, size, entry_path in sorted(entries):
+            if total_size <= self.max_size:
+                break
+            entry_path.unlink(missing_ok=True)
+            total_size -= size
@@ -0,0 +1,92 @@
+import struct
+import zlib
+
+# Size of the compressed chunks fed to zlib. Small enough to keep the
+# temporary output of every step small, large enough to keep the number of
+# Python level calls low.
+CHUNK_SIZE = 1 << 20
+
+DCX_MAGIC = b"DCX\0"
+DCP_MAGIC = b"DCP\0"
+
+
+def is_dcx(buffer):
+    """
+    Check whether a buffer holds a DCX container.
+
+    Args:
+        buffer: bytes-like object with the start of the file.
+    """
+    return bytes(buffer[:4]) in {DCX_MAGIC, DCP_MAGIC}
+
+
+def _read_header(buffer):
+    """
+    Parse the header of a DCX container. All fields are big-endian.
+
+    Returns:
+        tuple: (format, uncompressed size, compressed size, data offset)
+    """
+    magic = bytes(buffer[:4])
+    if magic == DCX_MAGIC:
+        # DCX\0, DCS\0 with the sizes at 0x18, DCP\0 with the format at 0x24
+        # and DCA\0 after the DCP block; the data follows the DCA block.
+        assert bytes(buffer[0x18:0x1C]) == b"DCS\0"
+        uncompressed_size, compressed_size = struct.unpack_from(">II", buffer, 0x1C)
+        assert bytes(buffer[0x24:0x28]) == b"DCP\0"
+        compression = bytes(buffer[0x28:0x2C])
+        dcp_size, = struct.unpack_from(">I", buffer, 0x2C)
+        dca_offset = 0x24 + dcp_size
+        assert bytes(buffer[dca_offset:dca_offset + 4]) == b"DCA\0"
+        dca_size, = struct.unpack_from(">I", buffer, dca_offset + 4)
+        data_offset = dca_offset + dca_size
+    elif magic == DCP_MAGIC:
+        # Older variant (Demon's Souls): DCP\0 first, DCS\0 at 0x20 and the
+        # data right after it; a DCA\0 trailer follows the data.
+        compression = bytes(buffer[0x04:0x08])
+        assert bytes(buffer[0x20:0x24]) == b"DCS\0"
+        uncompressed_size, compressed_size = struct.unpack_from(">II", buffer, 0x24)
+        data_offset = 0x2C
+    else:
+        raise Exception(f"not a DCX file (magic {magic!r})")
+    return compression, uncompressed_size, compressed_size, data_offset
+
+
+def decompress_dcx(buffer):
+    """
+    Decompress a zlib based (DFLT) DCX container in memory.
+
+    The compressed data is fed to zlib in chunks straight from the buffer,
+    which may be a memory mapped file, and the output is written into a
+    single preallocated buffer, so neither the compressed nor the
+    decompressed file is ever copied as a whole.
+
+    Args:
+        buffer: bytes-like object holding the whole DCX file.
+
+    Returns:
+        bytearray: The decompressed file.
+    """
+    compression, uncompressed_size, compressed_size, data_offset = _read_header(buffer)
+    if compression != b"DFLT":
+        raise Exception(f"unsupported DCX compression {compression.decode('ascii', 'replace')}"
+                        " (only DFLT is supported)")
+
+    result = bytearray(uncompressed_size)
+    decompressor = zlib.decompressobj()
+    position = 0
+    with memoryview(buffer)[data_offset:data_offset + compressed_size] as data, \
+            memoryview(result) as output:
+        for start in range(0, len(data), CHUNK_SIZE):
+            chunk = decompressor.decompress(data[start:start + CHUNK_SIZE])
+            output[position:position + len(chunk)] = chunk
+            position += len(chunk)
+            if decompressor.eof:
+                break
+        chunk = decompressor.flush()
+        output[position:position + len(chunk)] = chunk
+        position += len(chunk)
+
+    if position != uncompressed_size:
+        raise Exception(f"DCX decompressed to {position} bytes, expected {uncompressed_size}")
+    return result
@@ -1,11 +1,18 @@
 from enum import Enum
-import struct
+import numpy as np
 
 
 class Endianness(Enum):
     BIG = b"B\0"
     LITTLE = b"L\0"
 
+    # Byte order character understood by both struct and NumPy.
+    @property
+    def byte_order(self):
+        if self == Endianness.BIG:
+            return ">"
+        return "<"
+
 
 class TextEncoding(Enum):
     SHIFT_JIS = 0
@@ -105,31 +112,43 @@ class IndexBuffer:
         CULL = 1
 
     def __init__(self, detail_flags, primitive_mode, backface_visibility,
-                 unk06, indices):
+                 unk06, index_size, indices):
         self.detail_flags = detail_flags
         self.primitive_mode = primitive_mode
         self.backface_visibility = backface_visibility
         self.unk06 = unk06
+        self.index_size = index_size
         self.indices = indices
 
-    def _inflate(self, faces):
+    # An index size of 8 bits marks the Edge compressed index streams of PS3
+    # files, which are not decoded; their indices are None.
+    def _is_edge_compressed(self):
+        return self.index_size == 8
+
+    # Returns the faces described by this index buffer as an (N, 3) array of
+    # vertex indices. For triangle lists this is a view of the indices.
+    def _inflate(self):
+        indices = np.asarray(self.indices)
         if self.primitive_mode == self.PrimitiveMode.TRIANGLES:
-            for i in range(0, len(self.indices), 3):
-                faces.append(tuple(self.indices[i:i + 3]))
-        else:
-            direction = -1
-            f1 = self.indices[0]
-            f2 = self.indices[1]
-            for i in range(2, len(self.indices)):
-                f3 = self.indices[i]
-                direction *= -1
-                if f1 != f2 and f2 != f3 and f3 != f1:
-                    if direction > 0:
-                        faces.append((f1, f2, f3))
-                    else:
-                        faces.append((f1, f3, f2))
-                f1 = f2
-                f2 = f3
+            face_count = len(indices) // 3
+            return indices[:face_count * 3].reshape(face_count, 3)
+        return self._unroll_triangle_strip(indices)
+
+    # Convert a triangle strip into an (N, 3) array of triangles. Every second
+    # triangle has its winding flipped to keep all faces oriented the same
+    # way, and degenerate triangles (used to stitch strips together) are
+    # removed.
+    @staticmethod
+    def _unroll_triangle_strip(indices):
+        if len(indices) < 3:
+            return np.empty((0, 3), dtype=indices.dtype)
+        f1 = indices[:-2]
+        f2 = indices[1:-1]
+        f3 = indices[2:]
+        faces = np.stack((f1, f2, f3), axis=1)
+        faces[1::2, 1] = f3[1::2]
+        faces[1::2, 2] = f2[1::2]
+        return faces[(f1 != f2) & (f2 != f3) & (f3 != f1)]
 
 
 class VertexBuffer:
@@ -141,38 +160,51 @@ class VertexBuffer:
         self.vertex_count = vertex_count
         self.buffer_data = buffer_data
 
-    def _inflate(self, vertices, struct, version):
+    def _inflate(self, vertices, struct, version, byte_order):
+        # Only the attributes that inflated meshes keep are decoded.
+        vertices._append_buffer(self._decode_attributes(
+            struct, vertices._ATTRIBUTE_TYPES, version, byte_order))
+
+    # Decode the struct members with the given attribute types. Returns a list
+    # of (member, values) pairs in struct order.
+    def _decode_attributes(self, struct, attribute_types, version, byte_order):
         struct_size = sum(member.size() for member in struct)
         if self.struct_size != struct_size:
             print(f"Warning: struct size mismatch (expected {self.struct_size}, calculated {struct_size})")
         assert len(self.buffer_data) % self.struct_size == 0
 
-        # For now, only select from a limited set of attributes: POSITION,
-        # BONE_WEIGHTS, BONE_INDICES, and UV.
-        struct_members = [
-            member for member in struct if member.attribute_type in {
-                VertexBufferStructMember.AttributeType.POSITION,
-                VertexBufferStructMember.AttributeType.BONE_WEIGHTS,
-                VertexBufferStructMember.AttributeType.BONE_INDICES,
-                VertexBufferStructMember.AttributeType.UV,
-            }
-        ]
-
-        attribute_map = {
-            VertexBufferStructMember.AttributeType.POSITION:
-            vertices.positions,
-            VertexBufferStructMember.AttributeType.BONE_WEIGHTS:
-            vertices.bone_weights,
-            VertexBufferStructMember.AttributeType.BONE_INDICES:
-            vertices.bone_indices,
-            VertexBufferStructMember.AttributeType.UV: 
-            vertices.uv,
-        }
-        for member in struct_members:
-            for i in range(self.vertex_count):
-                data = member._unpack(self.buffer_data, i * self.struct_size, version)
-                attribute_map[member.attribute_type].append(data)
-
+        struct_members = []
+        for member in struct:
+            if member.attribute_type not in attribute_types:
+                continue
+            # Attributes in a format that cannot be decoded (EDGE_COMPRESSED)
+            # are skipped rather than failing the whole mesh. Meshes with such
+            # positions are skipped by Flver._inflate_mesh.
+            if (member.attribute_type != member.AttributeType.POSITION
+                    and member.data_type not in member._NUMPY_FORMATS):
+                print(f"Warning: skipping {member.attribute_type.name} stored as {member.data_type.name}")
+                continue
+            struct_members.append(member)
+        return self._decode(struct_members, version, byte_order)
+
+    # Decode the given struct members for every vertex in one pass by viewing
+    # the buffer as an array of records described by a structured dtype.
+    # Returns a list of (member, values) pairs, where values holds one row
+    # per vertex.
+    def _decode(self, struct_members, version, byte_order):
+        dtype = np.dtype({
+            "names": [f"m{i}" for i in range(len(struct_members))],
+            "formats": [
+                member._numpy_format(byte_order) for member in struct_members
+            ],
+            "offsets": [member.struct_offset for member in struct_members],
+            "itemsize": self.struct_size,
+        })
+        records = np.frombuffer(self.buffer_data,
+                                dtype=dtype,
+                                count=self.vertex_count)
+        return [(member, member._normalize(records[f"m{i}"], version))
+                for i, member in enumerate(struct_members)]
 
 
 class VertexBufferStructMember:
@@ -273,62 +305,96 @@ class VertexBufferStructMember:
             return 0  # EdgeCompressed is handled separately
         raise Exception(f"unknown size for data type: {self.data_type}")
 
-    def _unpack(self, buf, offset, version):
-        if version >= 0x2000F:
-            uv_divisor = 2048.0
+    # NumPy storage type and component count of every decodable data type.
+    _NUMPY_FORMATS = {
+        DataType.FLOAT1: ("f4", 1),
+        DataType.FLOAT2: ("f4", 2),
+        DataType.FLOAT3: ("f4", 3),
+        DataType.FLOAT4: ("f4", 4),
+        DataType.COLOR: ("u1", 4),
+        DataType.UBYTE4: ("u1", 4),
+        DataType.BYTE4: ("i1", 4),
+        DataType.UBYTE4_NORM: ("u1", 4),
+        DataType.BYTE4_NORM: ("i1", 4),
+        DataType.SHORT2: ("i2", 2),
+        DataType.SHORT4: ("i2", 4),
+        DataType.USHORT2: ("u2", 2),
+        DataType.USHORT4: ("u2", 4),
+        DataType.SHORT4_NORM: ("i2", 4),
+        DataType.HALF2: ("f2", 2),
+        DataType.HALF4: ("f2", 4),
+        DataType.BYTE4E: ("u1", 4),
+    }
+
+    # Data types whose integer values are scaled into the [-1, 1] or [0, 1]
+    # range.
+    _NORM_DIVISORS = {
+        DataType.UBYTE4_NORM: 255.0,
+        DataType.BYTE4_NORM: 127.0,
+        DataType.SHORT4_NORM: 32767.0,
+    }
+
+    # Short data types holding fixed point texture coordinates.
+    _UV_DATA_TYPES = {
+        DataType.SHORT2,
+        DataType.SHORT4,
+        DataType.USHORT2,
+    }
+
+    # Attribute types holding unit vectors.
+    _DIRECTION_ATTRIBUTE_TYPES = {
+        AttributeType.NORMAL,
+        AttributeType.TANGENT,
+        AttributeType.BITANGENT,
+    }
+
+    # (offset, divisor) of integer data types holding unit vectors, decoded
+    # as (value - offset) / divisor. Unsigned types are biased around 127 or
+    # 32767, signed types are plain normalized values.
+    _DIRECTION_ENCODINGS = {
+        DataType.COLOR: (127.0, 127.0),
+        DataType.UBYTE4: (127.0, 127.0),
+        DataType.UBYTE4_NORM: (127.0, 127.0),
+        DataType.BYTE4E: (127.0, 127.0),
+        DataType.BYTE4: (0.0, 127.0),
+        DataType.BYTE4_NORM: (0.0, 127.0),
+        DataType.SHORT4: (0.0, 32767.0),
+        DataType.SHORT4_NORM: (0.0, 32767.0),
+        DataType.USHORT4: (32767.0, 32767.0),
+    }
+
+    def _numpy_format(self, byte_order):
+        if self.data_type not in self._NUMPY_FORMATS:
+            raise Exception(f'Unsupported type {self.data_type}')
+        code, count = self._NUMPY_FORMATS[self.data_type]
+        if count == 1:
+            return byte_order + code
+        return (byte_order + code, (count, ))
+
+    # Convert the raw values of this member for all vertices at once into
+    # their final representation, applying the normalization of the data
+    # type.
+    def _normalize(self, values, version):
+        if (self.attribute_type in self._DIRECTION_ATTRIBUTE_TYPES
+                and self.data_type in self._DIRECTION_ENCODINGS):
+            offset, divisor = self._DIRECTION_ENCODINGS[self.data_type]
+            return ((values.astype(np.float32) - np.float32(offset)) /
+                    np.float32(divisor))
+        if (self.attribute_type == self.AttributeType.VERTEX_COLOR
+                and values.dtype == np.uint8):
+            return values.astype(np.float32) / np.float32(255.0)
+        if self.data_type in self._UV_DATA_TYPES:
+            if version >= 0x2000F:
+                divisor = 2048.0
+            else:
+                divisor = 1024.0
+        elif self.data_type in self._NORM_DIVISORS:
+            divisor = self._NORM_DIVISORS[self.data_type]
+        elif values.dtype.kind == "f":
+            return values.astype(np.float32)
         else:
-            uv_divisor = 1024.0
-        offset += self.struct_offset
-
-        # Float types
-        if self.data_type == self.DataType.FLOAT1:
-            return struct.unpack_from("f", buf, offset)[0]
-        if self.data_type == self.DataType.FLOAT2:
-            return tuple(struct.unpack_from("ff", buf, offset))
-        if self.data_type == self.DataType.FLOAT3:
-            return tuple(struct.unpack_from("fff", buf, offset))
-        if self.data_type == self.DataType.FLOAT4:
-            return tuple(struct.unpack_from("ffff", buf, offset))
-
-        # Byte types
-        if self.data_type in {self.DataType.COLOR, self.DataType.UBYTE4}:
-            return tuple(struct.unpack_from("BBBB", buf, offset))
-        if self.data_type == self.DataType.BYTE4:
-            return tuple(struct.unpack_from("bbbb", buf, offset))
-        if self.data_type == self.DataType.UBYTE4_NORM:
-            values = struct.unpack_from("BBBB", buf, offset)
-            return tuple(v / 255.0 for v in values)
-        if self.data_type == self.DataType.BYTE4_NORM:
-            values = struct.unpack_from("bbbb", buf, offset)
-            return tuple(v / 127.0 for v in values)
-        if self.data_type == self.DataType.BYTE4E:
-            return tuple(struct.unpack_from("BBBB", buf, offset))
-
-        # Short types (used for UV coordinates and bone indices)
-        if self.data_type == self.DataType.SHORT2:
-            uv = struct.unpack_from("hh", buf, offset)
-            return tuple(component / uv_divisor for component in uv)
-        if self.data_type == self.DataType.SHORT4:
-            uv = struct.unpack_from("hhhh", buf, offset)
-            return tuple(component / uv_divisor for component in uv)
-        if self.data_type == self.DataType.USHORT2:
-            uv = struct.unpack_from("HH", buf, offset)
-            return tuple(component / uv_divisor for component in uv)
-        if self.data_type == self.DataType.USHORT4:
-            return tuple(struct.unpack_from("HHHH", buf, offset))
-        if self.data_type == self.DataType.SHORT4_NORM:
-            values = struct.unpack_from("hhhh", buf, offset)
-            return tuple(v / 32767.0 for v in values)
-
-        # Half precision floats
-        if self.data_type == self.DataType.HALF2:
-            return tuple(struct.unpack_from("ee", buf, offset))
-        if self.data_type == self.DataType.HALF4:
-            return tuple(struct.unpack_from("eeee", buf, offset))
-
-        raise Exception(f'Unsupported type {self.data_type}')
-
-        
+            return values.astype(values.dtype.newbyteorder("="))
+        return values.astype(np.float32) / np.float32(divisor)
 
 
 class Texture:
@@ -345,16 +411,198 @@ class Texture:
 
 
 class InflatedMesh:
+    # Vertex attributes stored as contiguous arrays with one row per vertex.
+    # Texture coordinates are stored per UV set in uvs, a list of (N, 2)
+    # arrays.
     class Vertices:
+        __slots__ = ("positions", "bone_weights", "bone_indices", "uvs",
+                     "normals", "tangents", "bitangents", "colors")
+
+        # Attribute name, row width and array type for every attribute type
+        # that is kept.
+        _LAYOUT = {
+            VertexBufferStructMember.AttributeType.POSITION:
+            ("positions", 3, np.float32),
+            VertexBufferStructMember.AttributeType.BONE_WEIGHTS:
+            ("bone_weights", 4, np.float32),
+            VertexBufferStructMember.AttributeType.BONE_INDICES:
+            ("bone_indices", 4, np.uint16),
+            VertexBufferStructMember.AttributeType.NORMAL:
+            ("normals", 3, np.float32),
+            # The fourth component holds the handedness of the bitangent.
+            VertexBufferStructMember.AttributeType.TANGENT:
+            ("tangents", 4, np.float32),
+            VertexBufferStructMember.AttributeType.BITANGENT:
+            ("bitangents", 4, np.float32),
+            VertexBufferStructMember.AttributeType.VERTEX_COLOR:
+            ("colors", 4, np.float32),
+        }
+
+        # Every attribute type that is decoded.
+        _ATTRIBUTE_TYPES = frozenset(_LAYOUT) | {
+            VertexBufferStructMember.AttributeType.UV,
+        }
+
         def __init__(self):
-            self.positions = []
-            self.bone_weights = []
-            self.bone_indices = []
-            self.uv = []
+            for name, width, dtype in self._LAYOUT.values():
+                setattr(self, name, np.empty((0, width), dtype=dtype))
+            self.uvs = []
+
+        # Texture coordinates of the first UV set.
+        @property
+        def uv(self):
+            if len(self.uvs) == 0:
+                return np.empty((0, 2), dtype=np.float32)
+            return self.uvs[0]
+
+        # Append the decoded members of one vertex buffer.
+        def _append_buffer(self, decoded):
+            self._append_buffers([decoded])
+
+        # Append the decoded members of all vertex buffers of a mesh. The
+        # buffers are parallel streams over the same vertices, so the UV
+        # members of all of them are numbered into UV sets together, in the
+        # order of their index; a member with four components (FLOAT4,
+        # SHORT4) holds two UV sets.
+        def _append_buffers(self, decoded_buffers):
+            uv_set = 0
+            uv_members = []
+            for decoded in decoded_buffers:
+                for member, values in decoded:
+                    if member.attribute_type == VertexBufferStructMember.AttributeType.UV:
+                        uv_members.append((member, values))
+                    else:
+                        self._append(member, values)
+
+            uv_members.sort(key=lambda item: item[0].index)
+            for member, values in uv_members:
+                values = values.reshape(len(values), -1)
+                for column in range(0, max(values.shape[1] - 1, 1), 2):
+                    self._append_uv(uv_set, values[:, column:column + 2])
+                    uv_set += 1
+
+        # Append decoded values of a struct member, trimming or zero-padding
+        # the rows to the width of the attribute. Of the attributes a vertex
+        # can have several of, only the first set is kept.
+        def _append(self, member, values):
+            name, width, dtype = self._LAYOUT[member.attribute_type]
+            if member.index > 0:
+                return
+            setattr(self, name, self._concatenate(getattr(self, name), values,
+                                                  width, dtype))
+
+        def _append_uv(self, uv_set, values):
+            while len(self.uvs) <= uv_set:
+                self.uvs.append(np.empty((0, 2), dtype=np.float32))
+            self.uvs[uv_set] = self._concatenate(self.uvs[uv_set], values, 2,
+                                                 np.float32)
+
+        @staticmethod
+        def _concatenate(current, values, width, dtype):
+            values = values.reshape(len(values), -1)
+            rows = np.zeros((len(values), width), dtype=dtype)
+            columns = min(width, values.shape[1])
+            rows[:, :columns] = values[:, :columns]
+            if len(current) > 0:
+                rows = np.concatenate((current, rows))
+            return rows
+
+        # Returns the given vertices, in the given order. Attributes that are
+        # missing stay empty.
+        def take(self, indices):
+            result = InflatedMesh.Vertices()
+            for name, _, _ in self._LAYOUT.values():
+                values = getattr(self, name)
+                if len(values) > 0:
+                    values = values[indices]
+                setattr(result, name, values)
+            result.uvs = [uv[indices] if len(uv) > 0 else uv for uv in self.uvs]
+            return result
+
+    # Vertex attributes as lists of per-vertex tuples.
+    class ListVertices:
+        def __init__(self, vertices):
+            self.positions = [tuple(row) for row in vertices.positions.tolist()]
+            self.bone_weights = [
+                tuple(row) for row in vertices.bone_weights.tolist()
+            ]
+            self.bone_indices = [
+                tuple(row) for row in vertices.bone_indices.tolist()
+            ]
+            self.uv = [tuple(row) for row in vertices.uv.tolist()]
+
+    # Faces of an index buffer that is only used at a distance (LOD_LEVEL1,
+    # LOD_LEVEL2) or for motion blur, indexing the same vertices as the mesh.
+    class Lod:
+        __slots__ = ("detail_flags", "faces")
+
+        def __init__(self, detail_flags, faces):
+            self.detail_flags = detail_flags
+            self.faces = faces
+
+    # Faces and vertices as lists of tuples, for callers written against the
+    # list based representation.
+    class Lists:
+        def __init__(self, inflated_mesh):
+            self.faces = [tuple(face) for face in inflated_mesh.faces.tolist()]
+            self.vertices = InflatedMesh.ListVertices(inflated_mesh.vertices)
+
+    __slots__ = ("faces", "vertices", "lods")
 
     def __init__(self):
-        self.faces = []
+        # Vertex indices of every triangle, in the integer type of the index
+        # buffer they were read from.
+        self.faces = np.empty((0, 3), dtype=np.uint32)
         self.vertices = self.Vertices()
+        # Additional index buffers, only filled when inflating with LODs.
+        self.lods = []
+
+    def as_lists(self):
+        return self.Lists(self)
+
+    # Returns a mesh with the faces of the given LOD and only the vertices
+    # they use. The vertex attributes are gathered from the already decoded
+    # arrays of this mesh, so nothing is decoded again.
+    def lod_mesh(self, lod):
+        used, faces = np.unique(lod.faces, return_inverse=True)
+        result = InflatedMesh()
+        result.faces = faces.reshape(-1, 3).astype(lod.faces.dtype)
+        result.vertices = self.vertices.take(used)
+        return result
+
+    # Find vertices that can be merged: vertices whose positions fall into
+    # the same cell of a grid with the given spacing and that have the same
+    # bone indices and (nearly) the same bone weights. Attributes that can
+    # differ per face corner, like UVs, are not compared; callers look those
+    # up per loop with the original vertex indices.
+    # Returns (kept, vertex_map): the indices of the vertices that remain, in
+    # their original order, and for every vertex the index of the remaining
+    # vertex it merges into.
+    def weld_map(self, distance):
+        vertices = self.vertices
+        vertex_count = len(vertices.positions)
+        columns = [np.floor(vertices.positions / max(distance, 1e-12) + 0.5)
+                   .astype(np.int64)]
+        if len(vertices.bone_weights) == vertex_count:
+            columns.append(np.round(vertices.bone_weights * 10000.0)
+                           .astype(np.int64))
+        if len(vertices.bone_indices) == vertex_count:
+            columns.append(vertices.bone_indices.astype(np.int64))
+        keys = np.ascontiguousarray(np.concatenate(columns, axis=1))
+
+        # View every row as a single opaque value, so unique compares whole
+        # rows without sorting column by column.
+        keys = keys.view(np.dtype((np.void, keys.itemsize * keys.shape[1])))
+        _, first, inverse = np.unique(keys.ravel(),
+                                      return_index=True,
+                                      return_inverse=True)
+
+        # Number the remaining vertices in their original order
+        order = np.argsort(first)
+        kept = first[order]
+        renumber = np.empty(len(first), dtype=np.int64)
+        renumber[order] = np.arange(len(first))
+        return kept, renumber[inverse.ravel()]
 
 
 class Flver:
@@ -370,14 +618,97 @@ class Flver:
         self.vertex_buffers = vertex_buffers
         self.vertex_buffer_structs = vertex_buffer_structs
         self.textures = textures
+        # Decoded vertex buffer attributes, keyed by (buffer index, attribute
+        # types).
+        self._decoded_vertex_buffers = {}
+
+    # Parent of every bone, or -1 for roots. Parent indices that are out of
+    # range or that would form a cycle are treated as -1.
+    def bone_parent_indices(self):
+        bone_count = len(self.bones)
+        parent_indices = np.array([bone.parent_index for bone in self.bones],
+                                  dtype=np.int64).reshape(bone_count)
+        parent_indices[(parent_indices < 0) |
+                       (parent_indices >= bone_count)] = -1
+
+        # Assign depths level by level; bones whose depth is never resolved
+        # are part of a cycle.
+        depths = np.where(parent_indices < 0, 0, -1)
+        level = 0
+        while True:
+            resolved = (depths < 0) & (depths[parent_indices] == level)
+            if not resolved.any():
+                break
+            level += 1
+            depths[resolved] = level
+        parent_indices[depths < 0] = -1
+        return parent_indices
+
+    # World space matrices of all bones as an (N, 4, 4) array, in FLVER space.
+    # Each bone's local matrix is translation @ rotation (Y, Z, X order), and
+    # its world matrix is the parent's world matrix times its local matrix.
+    # Bones are processed one hierarchy level at a time, so every level is a
+    # single batched matrix product.
+    def bone_world_matrices(self):
+        bone_count = len(self.bones)
+        translations = np.array([bone.translation for bone in self.bones],
+                                dtype=np.float64).reshape(bone_count, 3)
+        rotations = np.array([bone.rotation for bone in self.bones],
+                             dtype=np.float64).reshape(bone_count, 3)
+
+        local_matrices = np.zeros((bone_count, 4, 4))
+        local_matrices[:, :3, :3] = (_rotation_matrices(rotations[:, 1], 1) @
+                                     _rotation_matrices(rotations[:, 2], 2) @
+                                     _rotation_matrices(rotations[:, 0], 0))
+        local_matrices[:, :3, 3] = translations
+        local_matrices[:, 3, 3] = 1.0
+
+        parent_indices = self.bone_parent_indices()
+        world_matrices = local_matrices.copy()
+        level = parent_indices < 0
+        while True:
+            level = (parent_indices >= 0) & level[parent_indices]
+            if not level.any():
+                break
+            world_matrices[level] = (world_matrices[parent_indices[level]]
+                                     @ local_matrices[level])
+        return world_matrices
+
+    # Drop the raw index and vertex buffer data once the meshes have been
+    # inflated. The buffers are views of the memory mapped file, so this both
+    # allows the mapping to be closed and makes the Flver picklable. Decoded
+    # vertex buffers are dropped as well, as the inflated meshes hold copies.
+    def release_buffers(self):
+        for index_buffer in self.index_buffers:
+            index_buffer.indices = None
+        for vertex_buffer in self.vertex_buffers:
+            vertex_buffer.buffer_data = None
+        self._decoded_vertex_buffers.clear()
+
+    # Decoded attributes of a vertex buffer as (member, values) pairs.
+    # Every buffer is decoded once per set of attribute types, no matter how
+    # many meshes reference it or how often the Flver is inflated.
+    def _decode_vertex_buffer(self, buffer_index, attribute_types):
+        key = (buffer_index, attribute_types)
+        decoded = self._decoded_vertex_buffers.get(key)
+        if decoded is None:
+            vertex_buffer = self.vertex_buffers[buffer_index]
+            decoded = vertex_buffer._decode_attributes(
+                struct=self.vertex_buffer_structs[vertex_buffer.struct_index],
+                attribute_types=attribute_types,
+                version=self.header.version,
+                byte_order=self.header.endianness.byte_order)
+            self._decoded_vertex_buffers[key] = decoded
+        return decoded
 
     # For every mesh, combine all index buffers into a single index buffer and
     # all vertex buffer attributes into individual corresponding attribute
-    # lists.
-    def inflate(self):
-        return [self._inflate_mesh(mesh) for mesh in self.meshes]
+    # arrays. With include_lods, the LOD and motion blur index buffers are
+    # triangulated as well and stored in the mesh's lods.
+    def inflate(self, include_lods=False):
+        return [self._inflate_mesh(mesh, include_lods) for mesh in self.meshes]
 
-    def _inflate_mesh(self, mesh):
+    def _inflate_mesh(self, mesh, include_lods=False):
         result = InflatedMesh()
 
         # Triangulate faces
@@ -388,17 +719,57 @@ class Flver:
         if len(index_buffers) == 0:
             return None
         assert len(index_buffers) == 1
-        index_buffers[0]._inflate(result.faces)
+        if index_buffers[0]._is_edge_compressed():
+            print("Warning: skipping mesh with Edge compressed indices "
+                  "(Edge decompression is not implemented)")
+            return None
+
+        # Edge compressed vertex streams are not decoded either
+        for index in mesh.vertex_buffer_indices:
+            struct = self.vertex_buffer_structs[
+                self.vertex_buffers[index].struct_index]
+            if any(member.attribute_type ==
+                   VertexBufferStructMember.AttributeType.POSITION
+                   and member.data_type ==
+                   VertexBufferStructMember.DataType.EDGE_COMPRESSED
+                   for member in struct):
+                print("Warning: skipping mesh with Edge compressed positions "
+                      "(Edge decompression is not implemented)")
+                return None
+
+        result.faces = index_buffers[0]._inflate()
+
+        if include_lods:
+            for index in mesh.index_buffer_indices:
+                index_buffer = self.index_buffers[index]
+                if (len(index_buffer.detail_flags) > 0
+                        and not index_buffer._is_edge_compressed()):
+                    result.lods.append(InflatedMesh.Lod(
+                        detail_flags=index_buffer.detail_flags,
+                        faces=index_buffer._inflate()))
 
         # Parse vertex buffer attributes
-        vertex_buffers = [
-            self.vertex_buffers[index] for index in mesh.vertex_buffer_indices
-        ]
-        assert len(vertex_buffers) > 0
-        for vertex_buffer in vertex_buffers:
-            struct = self.vertex_buffer_structs[vertex_buffer.struct_index]
-            vertex_buffer._inflate(vertices=result.vertices,
-                                   struct=struct,
-                                   version=self.header.version)
-
-        return result
\ No newline at end of file
+        assert len(mesh.vertex_buffer_indices) > 0
+        attribute_types = result.vertices._ATTRIBUTE_TYPES
+        result.vertices._append_buffers([
+            self._decode_vertex_buffer(index, attribute_types)
+            for index in mesh.vertex_buffer_indices
+        ])
+
+        return result
+
+
+# Rotation matrices around a single axis (0 = X, 1 = Y, 2 = Z) for an array of
+# angles, as an (N, 3, 3) array.
+def _rotation_matrices(angles, axis):
+    cos = np.cos(angles)
+    sin = np.sin(angles)
+    i = (axis + 1) % 3
+    j = (axis + 2) % 3
+    result = np.zeros((len(angles), 3, 3))
+    result[:, axis, axis] = 1.0
+    result[:, i, i] = cos
+    result[:, i, j] = -sin
+    result[:, j, i] = sin
+    result[:, j, j] = cos
+    return result
@@ -1,106 +1,202 @@
+import io
+import mmap
 import struct
 from collections import deque
-from . import flver
+from collections.abc import Sequence
+import numpy as np
+from . import binder, dcx, flver
 
+# Bytes searched for the terminator of a string before the window is grown
+STRING_SEARCH_WINDOW = 0x100
+
+# Compiled structs shared by every reader, keyed on byte order and format,
+# so parsing many files compiles each format only once per byte order.
+_STRUCTS = {}
+
+
+def _compile_struct(byte_order, fmt):
+    compiled = _STRUCTS.get((byte_order, fmt))
+    if compiled is None:
+        compiled = struct.Struct(byte_order + fmt)
+        _STRUCTS[(byte_order, fmt)] = compiled
+    return compiled
+
+
+# Reads structured data from an in-memory buffer such as bytes or a memory
+# mapped file. Large blocks like vertex and index data are returned as
+# memoryview slices of the buffer, so they are never copied.
 class StructReader:
-    def __init__(self, fp):
-        self.fp = fp
+    def __init__(self, buffer):
+        self.buffer = memoryview(buffer)
+        self.position = 0
         self.endianness = None
         self.text_encoding = None
+        self._strings = {}
 
     def tell(self):
-        return self.fp.tell()
+        return self.position
 
     def seek(self, offset):
-        self.fp.seek(offset, 0)
+        self.position = offset
 
     def read(self, count, offset=None):
-        if offset is not None:
-            position = self.fp.tell()
-            self.fp.seek(offset, 0)
-        result = self.fp.read(count)
-        if offset is not None:
-            self.fp.seek(position, 0)
-        return result
-
-    def read_struct(self, fmt, offset=None):
-        if offset is not None:
-            position = self.fp.tell()
-            self.fp.seek(offset, 0)
-
-        # Prefix endianness marker for struct
+        if offset is None:
+            offset = self.position
+            self.position += count
+        return self.buffer[offset:offset + count]
+
+    # The endianness is only known once the header has been read; until
+    # then formats are compiled without a byte order prefix.
+    def _struct(self, fmt):
         prefix = ""
-        if self.endianness == flver.Endianness.BIG:
-            prefix = ">"
-        elif self.endianness == flver.Endianness.LITTLE:
-            prefix = "<"
-
-        result = struct.unpack(prefix + fmt,
-                               self.fp.read(struct.calcsize(fmt)))
-        if offset is not None:
-            self.fp.seek(position, 0)
-        return result
+        if self.endianness is not None:
+            prefix = self.endianness.byte_order
+        return _compile_struct(prefix, fmt)
 
-    def read_string(self, offset=None):
-        if self.text_encoding == flver.TextEncoding.UTF_16:
-            terminator = b"\0\0"
-            encoding = "utf_16_le"
-        elif self.text_encoding == flver.TextEncoding.SHIFT_JIS:
-            terminator = b"\0"
-            encoding = "shift_jis"
-
-        if offset is not None:
-            position = self.fp.tell()
-            self.fp.seek(offset, 0)
-        raw_string = bytearray()
+    def read_struct(self, fmt, offset=None):
+        compiled = self._struct(fmt)
+        if offset is None:
+            offset = self.position
+            self.position += compiled.size
+        return compiled.unpack_from(self.buffer, offset)
+
+    # Reads count consecutive unsigned 32 bit integers as a tuple
+    def read_uint32s(self, count, offset):
+        values = np.frombuffer(self.read(count * 4, offset),
+                               dtype=self.endianness.byte_order + "u4")
+        return tuple(values.tolist())
+
+    # Unpacks count consecutive records of the same format in one call
+    def iter_structs(self, fmt, offset, count):
+        compiled = self._struct(fmt)
+        return compiled.iter_unpack(
+            self.buffer[offset:offset + count * compiled.size])
+
+    # Offset of the terminator of the string at start. Strings are short, so
+    # the search starts with a small window that grows only if needed; UTF-16
+    # terminators must be aligned to the start of the string.
+    def _find_terminator(self, start, terminator):
+        window = STRING_SEARCH_WINDOW
         while True:
-            char = self.fp.read(len(terminator))
-            if char == terminator:
-                break
-            raw_string.extend(char)
-        result = raw_string.decode(encoding=encoding)
-        if offset is not None:
-            self.fp.seek(position, 0)
+            chunk = bytes(self.buffer[start:start + window])
+            end = chunk.find(terminator)
+            while end > 0 and end % len(terminator):
+                end = chunk.find(terminator, end + 1)
+            if end >= 0:
+                return start + end
+            if start + window >= len(self.buffer):
+                raise Exception(f"unterminated string at offset {start:#x}")
+            window *= 4
+
+    # Strings are decoded once per offset, since several records (materials
+    # sharing an MTD, textures sharing a type) often point at the same one.
+    def read_string(self, offset=None):
+        start = self.position if offset is None else offset
+        cached = self._strings.get(start)
+        if cached is None:
+            if self.text_encoding == flver.TextEncoding.UTF_16:
+                terminator = b"\0\0"
+                # Strings follow the byte order of the file
+                if self.endianness == flver.Endianness.BIG:
+                    encoding = "utf_16_be"
+                else:
+                    encoding = "utf_16_le"
+            elif self.text_encoding == flver.TextEncoding.SHIFT_JIS:
+                terminator = b"\0"
+                encoding = "shift_jis"
+
+            end = self._find_terminator(start, terminator)
+            cached = (str(self.buffer[start:end], encoding=encoding),
+                      end + len(terminator))
+            self._strings[start] = cached
+
+        result, next_position = cached
+        if offset is None:
+            self.position = next_position
         return result
 
 
-def read_dummy(reader, header):
-    data = deque(reader.read_struct("fffBBBBfffHhfffh??IIII"))
-
-    position = (data.popleft(), data.popleft(), data.popleft())
+# Layout of a fixed size record: the struct format of its fields and the
+# function that builds the record from the unpacked fields. Schemas are
+# defined once per record type; the format is compiled once per byte order,
+# and a whole table of records is unpacked with a single iter_unpack call.
+# The builder is called as build(reader, *context, fields), where context
+# holds the per-file values a record type needs, such as the header.
+class RecordSchema:
+    def __init__(self, fmt, build):
+        self.fmt = fmt
+        self.build = build
+        self.size = struct.calcsize("<" + fmt)
+
+    def read(self, reader, offset, context=()):
+        return self.build(reader, *context, reader.read_struct(self.fmt, offset))
+
+    def read_all(self, reader, offset, count, context=()):
+        build = self.build
+        return [build(reader, *context, fields)
+                for fields in reader.iter_structs(self.fmt, offset, count)]
+
+
+# Sequence of fixed size records that are parsed on first access.
+class LazyRecords(Sequence):
+    def __init__(self, reader, offset, count, schema, context=()):
+        self.reader = reader
+        self.offset = offset
+        self.count = count
+        self.schema = schema
+        self.context = context
+        self._records = [None] * count
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(self.count))]
+        record = self._records[index]
+        if record is None:
+            if index < 0:
+                index += self.count
+            record = self.schema.read(
+                self.reader, self.offset + index * self.schema.size,
+                self.context)
+            self._records[index] = record
+        return record
+
+
+DUMMY_FORMAT = "fffBBBBfffHhfffh??IIII"
+
+
+def read_dummy(reader, header, fields):
+    (x, y, z, c0, c1, c2, c3,
+     forward_x, forward_y, forward_z,  # fff
+     reference_id,  # H
+     parent_bone_index,  # h
+     upward_x, upward_y, upward_z,  # fff
+     attach_bone_index,  # h
+     flag1,  # ?
+     use_upward_vector,  # ?
+     unk30,  # I
+     unk34,  # I
+     unk38,  # I
+     unk3C,  # I
+     ) = fields
+    assert unk38 == 0
+    assert unk3C == 0
 
     # Upstream is uncertain about RGB ordering
     if header.version == 0x20010:
-        b = data.popleft()  # B
-        g = data.popleft()  # B
-        r = data.popleft()  # B
-        a = data.popleft()  # B
+        b, g, r, a = c0, c1, c2, c3  # BBBB
     else:
-        a = data.popleft()  # B
-        r = data.popleft()  # B
-        g = data.popleft()  # B
-        b = data.popleft()  # B
-    color = (r, g, b, a)
-
-    forward = (data.popleft(), data.popleft(), data.popleft())  # fff
-    reference_id = data.popleft()  # H
-    parent_bone_index = data.popleft()  # h
-    upward = (data.popleft(), data.popleft(), data.popleft())  # fff
-    attach_bone_index = data.popleft()  # h
-    flag1 = data.popleft()  # ?
-    use_upward_vector = data.popleft()  # ?
-    unk30 = data.popleft()  # I
-    unk34 = data.popleft()  # I
-    assert data.popleft() == 0  # I
-    assert data.popleft() == 0  # I
+        a, r, g, b = c0, c1, c2, c3  # BBBB
 
     return flver.Dummy(
-        position=position,
-        color=color,
-        forward=forward,
+        position=(x, y, z),
+        color=(r, g, b, a),
+        forward=(forward_x, forward_y, forward_z),
         reference_id=reference_id,
         parent_bone_index=parent_bone_index,
-        upward=upward,
+        upward=(upward_x, upward_y, upward_z),
         attach_bone_index=attach_bone_index,
         flag1=flag1,
         use_upward_vector=use_upward_vector,
@@ -109,21 +205,27 @@ def read_dummy(reader, header):
     )
 
 
-def read_material(reader):
-    data = deque(reader.read_struct("IIIIIIII"))
+DUMMY_SCHEMA = RecordSchema(DUMMY_FORMAT, read_dummy)
 
-    name = reader.read_string(data.popleft())  # I
-    mtd_path = reader.read_string(data.popleft())  # I
-    texture_count = data.popleft()  # I
-    texture_index = data.popleft()  # I
-    flags = data.popleft()  # I
-    data.popleft()  # TODO: gx offset (I)
-    unk18 = data.popleft()  # I
-    assert data.popleft() == 0  # I
+
+MATERIAL_FORMAT = "IIIIIIII"
+
+
+def read_material(reader, fields):
+    (name_offset,  # I
+     mtd_path_offset,  # I
+     texture_count,  # I
+     texture_index,  # I
+     flags,  # I
+     _,  # TODO: gx offset (I)
+     unk18,  # I
+     unk1C,  # I
+     ) = fields
+    assert unk1C == 0
 
     return flver.Material(
-        name=name,
-        mtd_path=mtd_path,
+        name=reader.read_string(name_offset),
+        mtd_path=reader.read_string(mtd_path_offset),
         texture_count=texture_count,
         texture_index=texture_index,
         flags=flags,
@@ -131,55 +233,54 @@ def read_material(reader):
     )
 
 
-def read_bone(reader):
-    data = deque(reader.read_struct("fffIfffhhfffhhfffIfff"))
+MATERIAL_SCHEMA = RecordSchema(MATERIAL_FORMAT, read_material)
+
 
-    translation = (data.popleft(), data.popleft(), data.popleft())  # fff
-    name = reader.read_string(data.popleft())  # I
-    rotation = (data.popleft(), data.popleft(), data.popleft())  # fff
-    parent_index = data.popleft()  # h
-    child_index = data.popleft()  # h
-    scale = (data.popleft(), data.popleft(), data.popleft())  # fff
-    next_sibling_index = data.popleft()  # h
-    previous_sibling_index = data.popleft()  # h
-    bounding_box_min = (data.popleft(), data.popleft(), data.popleft())  # fff
-    unk3C = data.popleft()  # I
-    bounding_box_max = (data.popleft(), data.popleft(), data.popleft())  # fff
-    assert reader.read(0x34) == b"\0" * 0x34
+# The last 0x34 bytes of a bone are zero padding
+BONE_FORMAT = "fffIfffhhfffhhfffIfff52s"
+BONE_PADDING = b"\0" * 0x34
+
+
+def read_bone(reader, fields):
+    assert fields[21] == BONE_PADDING
 
     return flver.Bone(
-        translation=translation,
-        name=name,
-        rotation=rotation,
-        parent_index=parent_index,
-        child_index=child_index,
-        scale=scale,
-        next_sibling_index=next_sibling_index,
-        previous_sibling_index=previous_sibling_index,
-        bounding_box_min=bounding_box_min,
-        unk3C=unk3C,
-        bounding_box_max=bounding_box_max,
+        translation=fields[0:3],  # fff
+        name=reader.read_string(fields[3]),  # I
+        rotation=fields[4:7],  # fff
+        parent_index=fields[7],  # h
+        child_index=fields[8],  # h
+        scale=fields[9:12],  # fff
+        next_sibling_index=fields[12],  # h
+        previous_sibling_index=fields[13],  # h
+        bounding_box_min=fields[14:17],  # fff
+        unk3C=fields[17],  # I
+        bounding_box_max=fields[18:21],  # fff
     )
 
-def read_mesh(reader):
-    data = deque(reader.read_struct("BBBBIIIIIIIIIII"))
 
-    dynamic_mode = flver.Mesh.DynamicMode(data.popleft())  # B
-    data.popleft()  # B - reserved, can be non-zero in newer versions
-    data.popleft()  # B - reserved
-    data.popleft()  # B - reserved
-    material_index = data.popleft()  # I
-    data.popleft()  # I - reserved, can be non-zero in newer versions
-    data.popleft()  # I - reserved
-    default_bone_index = data.popleft()  # I
-    bone_count_raw = data.popleft()  # I
-    bounding_offset = data.popleft()  # TODO: bounding box offset (I)
-    bone_offset = data.popleft()  # I
-    index_buffer_count = data.popleft()  # I
-    index_buffer_offset = data.popleft()  # I
-    vertex_buffer_count = data.popleft()  # I
+BONE_SCHEMA = RecordSchema(BONE_FORMAT, read_bone)
+
+
+MESH_FORMAT = "BBBBIIIIIIIIIII"
+
+
+def read_mesh(reader, fields):
+    (dynamic_mode,  # B
+     _, _, _,  # BBB - reserved, the first can be non-zero in newer versions
+     material_index,  # I
+     _,  # I - reserved, can be non-zero in newer versions
+     _,  # I - reserved
+     default_bone_index,  # I
+     bone_count_raw,  # I
+     _,  # TODO: bounding box offset (I)
+     bone_offset,  # I
+     index_buffer_count,  # I
+     index_buffer_offset,  # I
+     vertex_buffer_count,  # I
+     vertex_buffer_offset,  # I
+     ) = fields
     assert vertex_buffer_count >= 1  # At least 1 vertex buffer required
-    vertex_buffer_offset = data.popleft()  # I
 
     # For newer versions (Elden Ring Nightreign+), use actual bone_count from file
     # For older versions (DS3), the raw value may be 0, so use default_bone_index as workaround
@@ -188,14 +289,14 @@ def read_mesh(reader):
     else:
         bone_count = default_bone_index
 
-    bone_indices = reader.read_struct("I" * bone_count, bone_offset)
-    index_buffer_indices = reader.read_struct("I" * index_buffer_count,
-                                              index_buffer_offset)
-    vertex_buffer_indices = reader.read_struct("I" * vertex_buffer_count,
-                                               vertex_buffer_offset)
+    bone_indices = reader.read_uint32s(bone_count, bone_offset)
+    index_buffer_indices = reader.read_uint32s(index_buffer_count,
+                                               index_buffer_offset)
+    vertex_buffer_indices = reader.read_uint32s(vertex_buffer_count,
+                                                vertex_buffer_offset)
 
     return flver.Mesh(
-        dynamic_mode=dynamic_mode,
+        dynamic_mode=flver.Mesh.DynamicMode(dynamic_mode),
         material_index=material_index,
         default_bone_index=default_bone_index,
         bone_indices=bone_indices,
@@ -204,60 +305,82 @@ def read_mesh(reader):
     )
 
 
-def read_index_buffer(reader, header, data_offset):
-    data = deque(reader.read_struct("IBBHII"))
+MESH_SCHEMA = RecordSchema(MESH_FORMAT, read_mesh)
+
+
+# Versions after 0x20005 append the length and size of the indices
+INDEX_BUFFER_FORMAT = "IBBHIIIIII"
+INDEX_BUFFER_FORMAT_20005 = "IBBHII"
+
+
+def read_index_buffer(reader, header, data_offset, fields):
+    (detail_binary_flags,  # I
+     primitive_mode,  # B
+     backface_visibility,  # B
+     unk06,  # H
+     index_count,  # I
+     indices_offset,  # I
+     ) = fields[:6]
 
     detail_flags = set()
-    detail_binary_flags = data.popleft()  # I
     for flag in flver.IndexBuffer.DetailFlags:
         if (detail_binary_flags & flag.value) != 0:
             detail_flags.add(flag)
 
-    primitive_mode = flver.IndexBuffer.PrimitiveMode(data.popleft())  # B
-    backface_visibility = flver.IndexBuffer.BackfaceVisibility(
-        data.popleft())  # B
-    unk06 = data.popleft()
-    index_count = data.popleft()  # I
-    indices_offset = data.popleft()  # I
-
     index_size = 0
-    if header.version > 0x20005:
-        additional_data = deque(reader.read_struct("IIII"))
-        assert additional_data.popleft() >= 0  # indices length (I)
-        assert additional_data.popleft() == 0  # I
-        index_size = additional_data.popleft()  # I
-        assert index_size in {0, 16, 32}
-        assert additional_data.popleft() == 0  # I
+    if len(fields) > 6:
+        indices_length, unk14, index_size, unk1C = fields[6:]  # IIII
+        assert indices_length >= 0
+        assert unk14 == 0
+        assert index_size in {0, 8, 16, 32}
+        assert unk1C == 0
     if index_size == 0:
         index_size = header.default_vertex_index_size
 
-    if index_size == 16:
-        indices = reader.read_struct("H" * index_count,
-                                     data_offset + indices_offset)
-    elif index_size == 32:
-        indices = reader.read_struct("I" * index_count,
-                                     data_offset + indices_offset)
+    # 8 bit indices are Edge compressed index streams (PS3), which are kept
+    # undecoded
+    indices = None
+    if index_size in {16, 32}:
+        index_type = "u2" if index_size == 16 else "u4"
+        indices = np.frombuffer(
+            reader.read(index_count * index_size // 8,
+                        data_offset + indices_offset),
+            dtype=header.endianness.byte_order + index_type)
+        # Byte swap indices of big-endian files in one go. Indices that are
+        # already in native order stay a view of the file.
+        indices = indices.astype(indices.dtype.newbyteorder("="), copy=False)
 
     return flver.IndexBuffer(
         detail_flags=detail_flags,
-        primitive_mode=primitive_mode,
-        backface_visibility=backface_visibility,
+        primitive_mode=flver.IndexBuffer.PrimitiveMode(primitive_mode),
+        backface_visibility=flver.IndexBuffer.BackfaceVisibility(
+            backface_visibility),
         unk06=unk06,
+        index_size=index_size,
         indices=indices,
     )
 
 
-def read_vertex_buffer(reader, data_offset):
-    data = deque(reader.read_struct("IIIIIIII"))
+INDEX_BUFFER_SCHEMA = RecordSchema(INDEX_BUFFER_FORMAT, read_index_buffer)
+INDEX_BUFFER_SCHEMA_20005 = RecordSchema(INDEX_BUFFER_FORMAT_20005,
+                                         read_index_buffer)
+
+
+VERTEX_BUFFER_FORMAT = "IIIIIIII"
 
-    buffer_index = data.popleft()  # I
-    struct_index = data.popleft()  # I
-    struct_size = data.popleft()  # I
-    vertex_count = data.popleft()  # I
-    assert data.popleft() == 0  # I
-    assert data.popleft() == 0  # I
-    buffer_length = data.popleft()  # I
-    buffer_offset = data.popleft()  # I
+
+def read_vertex_buffer(reader, data_offset, fields):
+    (buffer_index,  # I
+     struct_index,  # I
+     struct_size,  # I
+     vertex_count,  # I
+     unk10,  # I
+     unk14,  # I
+     buffer_length,  # I
+     buffer_offset,  # I
+     ) = fields
+    assert unk10 == 0
+    assert unk14 == 0
 
     # Read buffer data
     buffer_data = reader.read(buffer_length, data_offset + buffer_offset)
@@ -271,65 +394,80 @@ def read_vertex_buffer(reader, data_offset):
     )
 
 
-def read_vertex_buffer_struct_member(reader, struct_offset):
-    data = deque(reader.read_struct("IIIII"))
+VERTEX_BUFFER_SCHEMA = RecordSchema(VERTEX_BUFFER_FORMAT, read_vertex_buffer)
+
+
+VERTEX_BUFFER_STRUCT_MEMBER_FORMAT = "IIIII"
 
-    unk00 = data.popleft()  # I
-    assert data.popleft() == struct_offset
-    data_type = flver.VertexBufferStructMember.DataType(data.popleft())  # I
-    attribute_type = flver.VertexBufferStructMember.AttributeType(
-        data.popleft())  # I
-    index = data.popleft()  # I
+
+def read_vertex_buffer_struct_member(fields, struct_offset):
+    (unk00,  # I
+     member_struct_offset,  # I
+     data_type,  # I
+     attribute_type,  # I
+     index,  # I
+     ) = fields
+    assert member_struct_offset == struct_offset
 
     return flver.VertexBufferStructMember(
         unk00=unk00,
         struct_offset=struct_offset,
-        data_type=data_type,
-        attribute_type=attribute_type,
+        data_type=flver.VertexBufferStructMember.DataType(data_type),
+        attribute_type=flver.VertexBufferStructMember.AttributeType(
+            attribute_type),
         index=index,
     )
 
 
-def read_vertex_buffer_structs(reader):
-    data = deque(reader.read_struct("IIII"))
+VERTEX_BUFFER_STRUCT_FORMAT = "IIII"
 
-    member_count = data.popleft()  # I
-    assert data.popleft() == 0  # I
-    assert data.popleft() == 0  # I
-    member_offset = data.popleft()  # I
 
-    position = reader.tell()
-    reader.seek(member_offset)
+def read_vertex_buffer_structs(reader, fields):
+    (member_count,  # I
+     unk04,  # I
+     unk08,  # I
+     member_offset,  # I
+     ) = fields
+    assert unk04 == 0
+    assert unk08 == 0
 
     struct_offset = 0
     result = []
-    for _ in range(member_count):
-        member = read_vertex_buffer_struct_member(reader, struct_offset)
+    for member_fields in reader.iter_structs(
+            VERTEX_BUFFER_STRUCT_MEMBER_FORMAT, member_offset, member_count):
+        member = read_vertex_buffer_struct_member(member_fields, struct_offset)
         struct_offset += member.size()
         result.append(member)
-
-    reader.seek(position)
     return result
 
-def read_texture(reader):
-    data = deque(reader.read_struct("IIffB?BBfff"))
 
-    path = reader.read_string(data.popleft())  # I
-    type_name = reader.read_string(data.popleft())  # I
-    scale = (data.popleft(), data.popleft())  # ff
-    unk10 = data.popleft()  # B
+VERTEX_BUFFER_STRUCT_SCHEMA = RecordSchema(VERTEX_BUFFER_STRUCT_FORMAT,
+                                           read_vertex_buffer_structs)
+
+
+TEXTURE_FORMAT = "IIffB?BBfff"
+
+
+def read_texture(reader, fields):
+    (path_offset,  # I
+     type_name_offset,  # I
+     scale_x, scale_y,  # ff
+     unk10,  # B
+     unk11,  # ?
+     unk12,  # B
+     unk13,  # B
+     unk14,  # f
+     unk18,  # f
+     unk1C,  # f
+     ) = fields
     assert unk10 in {0, 1, 2}
-    unk11 = data.popleft()  # ?
-    assert data.popleft() == 0  # B
-    assert data.popleft() == 0  # B
-    unk14 = data.popleft()  # f
-    unk18 = data.popleft()  # f
-    unk1C = data.popleft()  # f
+    assert unk12 == 0
+    assert unk13 == 0
 
     return flver.Texture(
-        path=path,
-        type_name=type_name,
-        scale=scale,
+        path=reader.read_string(path_offset),
+        type_name=reader.read_string(type_name_offset),
+        scale=(scale_x, scale_y),
         unk10=unk10,
         unk11=unk11,
         unk14=unk14,
@@ -338,116 +476,182 @@ def read_texture(reader):
     )
 
 
-def read_flver(file_name):
-    with open(file_name, 'rb') as fp:
-        reader = StructReader(fp)
-
-        # Read until endianness
-        data = deque(reader.read_struct("6s2s"))
-        assert data.popleft() == b"FLVER\0"
-        endianness = flver.Endianness(data.popleft())
-        reader.endianness = endianness
-
-        data = deque(
-            reader.read_struct("IIIIIIIIffffffIIBB?BIIIIBBBBIIIIIIII"))
-        # Gundam Unicorn: 0x20005, 0x2000E
-        # DS1: 2000C, 2000D
-        # DS2 NT: 2000F, 20010
-        # DS2: 20010, 20009 (armor 9320)
-        # SFS: 20010
-        # BB:  20013, 20014
-        # DS3: 20013, 20014
-        # SDT: 2001A, 20016 (test chr)
-        version = data.popleft()  # I
-        assert version in {
-            0x20005, 0x20007, 0x20009, 0x2000B, 0x2000C, 0x2000D, 0x2000E,
-            0x2000F, 0x20010, 0x20013, 0x20014, 0x20016, 0x20017, 0x2001A,
-            0x2001B, 0x20021
-        }
-
-        data_offset = data.popleft()  # I
-        assert data.popleft() >= 0  # data length (I)
-        dummy_count = data.popleft()  # I
-        material_count = data.popleft()  # I
-        bone_count = data.popleft()  # I
-        mesh_count = data.popleft()  # I
-        vertex_buffer_count = data.popleft()  # I
-
-        # fff
-        bounding_box_min = (data.popleft(), data.popleft(), data.popleft())
-        # fff
-        bounding_box_max = (data.popleft(), data.popleft(), data.popleft())
-
-        assert data.popleft() >= 0  # Face count of main mesh (I)
-        assert data.popleft() >= 0  # Total face count of all meshes (I)
-
-        default_vertex_index_size = data.popleft()  # B
-        assert default_vertex_index_size in {0, 8, 16, 32}
-        text_encoding = flver.TextEncoding(data.popleft())  # B
-        reader.text_encoding = text_encoding
-        unk4A = data.popleft()  # ?
-        assert data.popleft() == 0  # B
-
-        unk4C = data.popleft()  # I
-        index_buffer_count = data.popleft()  # I
-        vertex_buffer_struct_count = data.popleft()  # I
-        texture_count = data.popleft()  # I
-
-        unk5C = data.popleft()  # B
-        unk5D = data.popleft()  # B
-        assert data.popleft() == 0  # B
-        assert data.popleft() == 0  # B
-
-        data.popleft()  # I - reserved, can be non-zero in newer versions
-        data.popleft()  # I - reserved, can be non-zero in newer versions
-        unk68 = data.popleft()  # I
-        assert unk68 in {0, 1, 2, 3, 4, 5}  # Added 5 for newer versions
-        data.popleft()  # I - reserved
-        data.popleft()  # I - reserved
-        data.popleft()  # I - Unk74, can be 0 or 0x10
-        data.popleft()  # I - reserved
-        data.popleft()  # I - reserved
-
-        header = flver.Header(
-            endianness=endianness,
-            version=version,
-            bounding_box_min=bounding_box_min,
-            bounding_box_max=bounding_box_max,
-            default_vertex_index_size=default_vertex_index_size,
-            text_encoding=text_encoding,
-            unk4A=unk4A,
-            unk4C=unk4C,
-            unk5C=unk5C,
-            unk5D=unk5D,
-            unk68=unk68,
-        )
-
-        dummies = []
-        for _ in range(dummy_count):
-            dummies.append(read_dummy(reader, header))
-        materials = []
-        for _ in range(material_count):
-            materials.append(read_material(reader))
-        bones = []
-        for _ in range(bone_count):
-            bones.append(read_bone(reader))
-        meshes = []
-        for _ in range(mesh_count):
-            meshes.append(read_mesh(reader))
-        index_buffers = []
-        for _ in range(index_buffer_count):
-            index_buffers.append(read_index_buffer(reader, header,
-                                                   data_offset))
-        vertex_buffers = []
-        for _ in range(vertex_buffer_count):
-            vertex_buffers.append(read_vertex_buffer(reader, data_offset))
-        vertex_buffer_structs = []
-        for _ in range(vertex_buffer_struct_count):
-            vertex_buffer_structs.append(read_vertex_buffer_structs(reader))
-        textures = []
-        for _ in range(texture_count):
-            textures.append(read_texture(reader))
-        # Ignore unknown Sekiro struct for now
+TEXTURE_SCHEMA = RecordSchema(TEXTURE_FORMAT, read_texture)
+
+
+# Whether a file object reads straight from a file on disk, so mapping its
+# descriptor gives the same bytes. Wrappers such as gzip.GzipFile also have a
+# fileno(), but it belongs to the compressed file.
+def _is_disk_file(source):
+    if isinstance(source, (io.BufferedReader, io.BufferedRandom)):
+        source = source.raw
+    return isinstance(source, io.FileIO)
+
+
+# Buffer of a FLVER or binder source without copying it: bytes-like objects
+# are used as they are, paths and files on disk are memory mapped and
+# in-memory streams expose their own buffer; other file objects are read.
+# Only the data after the current position of a file object is used. DCX
+# compressed data is decompressed into memory.
+def open_buffer(source):
+    if isinstance(source, (bytes, bytearray, memoryview, mmap.mmap)):
+        buffer = source
+    elif hasattr(source, "read"):
+        position = source.tell()
+        if _is_disk_file(source):
+            buffer = memoryview(mmap.mmap(source.fileno(), 0, access=mmap.ACCESS_READ))
+        elif hasattr(source, "getbuffer"):
+            buffer = source.getbuffer()
+        else:
+            buffer = memoryview(source.read())
+            position = 0
+        if position:
+            buffer = buffer[position:]
+    else:
+        # Map the file instead of reading it, so only the pages that are
+        # actually parsed or decoded get loaded.
+        with open(source, 'rb') as fp:
+            buffer = mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ)
+        # The mapping is not needed once a compressed file is decompressed
+        if dcx.is_dcx(buffer):
+            compressed = buffer
+            buffer = dcx.decompress_dcx(compressed)
+            compressed.close()
+        return buffer
+
+    if dcx.is_dcx(buffer):
+        buffer = dcx.decompress_dcx(buffer)
+    return buffer
+
+
+# Read a FLVER file. With lazy set, only the header is parsed up front; every
+# record (dummies, materials, bones, meshes, buffers, ...) is parsed the first
+# time it is accessed, so scanning metadata of many files only touches the
+# few pages that are actually looked at.
+# The source is a path, a bytes-like object (bytes, bytearray, memoryview,
+# mmap) or a seekable file object holding a .flver or .flver.dcx file; its
+# data is parsed in place without being copied.
+def read_flver(source, lazy=False, entry_name=None):
+    buffer = open_buffer(source)
+
+    # A FLVER stored in a binder is parsed straight from its entry, which is
+    # a slice of the binder buffer unless the entry itself is compressed.
+    if entry_name is not None:
+        buffer = binder.parse_binder(buffer).read(entry_name)
+    return _read_flver_buffer(buffer, lazy)
+
+
+def _read_flver_buffer(buffer, lazy=False):
+    reader = StructReader(buffer)
+
+    # Read until endianness
+    data = deque(reader.read_struct("6s2s"))
+    assert data.popleft() == b"FLVER\0"
+    endianness = flver.Endianness(data.popleft())
+    reader.endianness = endianness
+
+    data = deque(
+        reader.read_struct("IIIIIIIIffffffIIBB?BIIIIBBBBIIIIIIII"))
+    # Gundam Unicorn: 0x20005, 0x2000E
+    # DS1: 2000C, 2000D
+    # DS2 NT: 2000F, 20010
+    # DS2: 20010, 20009 (armor 9320)
+    # SFS: 20010
+    # BB:  20013, 20014
+    # DS3: 20013, 20014
+    # SDT: 2001A, 20016 (test chr)
+    version = data.popleft()  # I
+    assert version in {
+        0x20005, 0x20007, 0x20009, 0x2000B, 0x2000C, 0x2000D, 0x2000E,
+        0x2000F, 0x20010, 0x20013, 0x20014, 0x20016, 0x20017, 0x2001A,
+        0x2001B, 0x20021
+    }
+
+    data_offset = data.popleft()  # I
+    assert data.popleft() >= 0  # data length (I)
+    dummy_count = data.popleft()  # I
+    material_count = data.popleft()  # I
+    bone_count = data.popleft()  # I
+    mesh_count = data.popleft()  # I
+    vertex_buffer_count = data.popleft()  # I
+
+    # fff
+    bounding_box_min = (data.popleft(), data.popleft(), data.popleft())
+    # fff
+    bounding_box_max = (data.popleft(), data.popleft(), data.popleft())
+
+    assert data.popleft() >= 0  # Face count of main mesh (I)
+    assert data.popleft() >= 0  # Total face count of all meshes (I)
+
+    default_vertex_index_size = data.popleft()  # B
+    assert default_vertex_index_size in {0, 8, 16, 32}
+    text_encoding = flver.TextEncoding(data.popleft())  # B
+    reader.text_encoding = text_encoding
+    unk4A = data.popleft()  # ?
+    assert data.popleft() == 0  # B
+
+    unk4C = data.popleft()  # I
+    index_buffer_count = data.popleft()  # I
+    vertex_buffer_struct_count = data.popleft()  # I
+    texture_count = data.popleft()  # I
+
+    unk5C = data.popleft()  # B
+    unk5D = data.popleft()  # B
+    assert data.popleft() == 0  # B
+    assert data.popleft() == 0  # B
+
+    data.popleft()  # I - reserved, can be non-zero in newer versions
+    data.popleft()  # I - reserved, can be non-zero in newer versions
+    unk68 = data.popleft()  # I
+    assert unk68 in {0, 1, 2, 3, 4, 5}  # Added 5 for newer versions
+    data.popleft()  # I - reserved
+    data.popleft()  # I - reserved
+    data.popleft()  # I - Unk74, can be 0 or 0x10
+    data.popleft()  # I - reserved
+    data.popleft()  # I - reserved
+
+    header = flver.Header(
+        endianness=endianness,
+        version=version,
+        bounding_box_min=bounding_box_min,
+        bounding_box_max=bounding_box_max,
+        default_vertex_index_size=default_vertex_index_size,
+        text_encoding=text_encoding,
+        unk4A=unk4A,
+        unk4C=unk4C,
+        unk5C=unk5C,
+        unk5D=unk5D,
+        unk68=unk68,
+    )
+
+    # The record tables follow each other directly after the header, so
+    # their offsets follow from the record counts and sizes.
+    if version > 0x20005:
+        index_buffer_schema = INDEX_BUFFER_SCHEMA
+    else:
+        index_buffer_schema = INDEX_BUFFER_SCHEMA_20005
+    sections = [
+        (dummy_count, DUMMY_SCHEMA, (header,)),
+        (material_count, MATERIAL_SCHEMA, ()),
+        (bone_count, BONE_SCHEMA, ()),
+        (mesh_count, MESH_SCHEMA, ()),
+        (index_buffer_count, index_buffer_schema, (header, data_offset)),
+        (vertex_buffer_count, VERTEX_BUFFER_SCHEMA, (data_offset,)),
+        (vertex_buffer_struct_count, VERTEX_BUFFER_STRUCT_SCHEMA, ()),
+        (texture_count, TEXTURE_SCHEMA, ()),
+    ]
+    offset = reader.tell()
+    records = []
+    for count, schema, context in sections:
+        if lazy:
+            records.append(
+                LazyRecords(reader, offset, count, schema, context))
+        else:
+            records.append(schema.read_all(reader, offset, count, context))
+        offset += count * schema.size
+    (dummies, materials, bones, meshes, index_buffers, vertex_buffers,
+     vertex_buffer_structs, textures) = records
+    # Ignore unknown Sekiro struct for now
 
     return flver.Flver(
         header=header,
@@ -459,4 +663,4 @@ def read_flver(file_name):
         vertex_buffers=vertex_buffers,
         vertex_buffer_structs=vertex_buffer_structs,
         textures=textures,
-    )
\ No newline at end of file
+    )
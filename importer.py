@@ -1,32 +1,271 @@
 import bpy
-import bmesh
+import numpy as np
 import time
-from pathlib import Path
-from mathutils import Matrix, Vector
+from pathlib import Path, PureWindowsPath
 from bpy.app.translations import pgettext
 
-from .flver_utils import read_flver
+from . import binder
+from .flver import IndexBuffer
+from .parallel import iter_load_flvers, load_flver
+from .profiling import ImportProfile
 
+# Blender supports at most 8 UV maps per mesh
+MAX_UV_LAYERS = 8
 
-def import_flver(file_path, z_up=True, connect_bones=False):
+
+def import_flver(file_path, z_up=True, connect_bones=False, cache=None,
+                 all_vertex_groups=False, profile=None, import_lods=False,
+                 weld_distance=None, custom_normals=True, entry_name=None,
+                 binder_data=None):
     """
     Import a FLVER file into Blender.
 
     Args:
-        file_path (Path): Path to the .flver file.
+        file_path (Path): Path to the .flver file, or to the binder holding it.
         z_up (bool): If True, convert to Blender's Z-up coordinate system.
                      If False, keep FromSoftware's Y-up coordinate system.
+        cache (MeshCache): If given, reuse the parsed data of unchanged files
+                           and store the data of newly parsed ones.
+        all_vertex_groups (bool): If True, create a vertex group for every bone
+                                  on every mesh, not only the weighted ones.
+        profile (ImportProfile): If given, stage timings and counters of the
+                                 file are recorded in it.
+        import_lods (bool): If True, also import LOD and motion blur index
+                            buffers as separate meshes.
+        weld_distance (float): If given, merge vertices of a mesh whose
+                               positions snap to the same point of a grid
+                               with this spacing and that share their bone
+                               weights.
+        custom_normals (bool): If True, use the normals stored in the file as
+                               custom split normals.
+        entry_name (str): If given, file_path is a binder and the FLVER is
+                          read from the entry with this name.
+        binder_data (Binder): The already parsed binder at file_path, so that
+                              it is not read again for every entry.
     """
+    if profile is None:
+        profile = ImportProfile(enabled=False)
     file_path = Path(file_path)
-    print(f"Importing FLVER from {file_path}")
+    print(f"Importing FLVER from {get_source_name(file_path, entry_name)}")
 
     time_start = time.perf_counter()
+    load_options = {"include_lods": import_lods, "entry_name": entry_name}
+
+    with profile.capture(), profile.file(get_source_name(file_path, entry_name)):
+        # Read FLVER data
+        loaded = None
+        if cache is not None:
+            with profile.stage("cache"):
+                loaded = cache.get(file_path, load_options)
+            profile.count("cache_hits", loaded is not None)
+        if loaded is None:
+            timings = {}
+            source = file_path
+            if entry_name is not None:
+                if binder_data is None:
+                    binder_data = binder.read_binder(file_path)
+                source = binder_data.read(entry_name)
+            loaded = load_flver(source, timings, import_lods)
+            for stage, seconds in timings.items():
+                profile.record(stage, seconds)
+            if cache is not None:
+                with profile.stage("cache"):
+                    cache.put(file_path, *loaded, load_options)
+        flver_data, inflated_meshes = loaded
+
+        build_flver(get_base_name(file_path, entry_name), flver_data, inflated_meshes, z_up,
+                    connect_bones, all_vertex_groups, profile, import_lods, weld_distance,
+                    custom_normals)
+
+    time_end = time.perf_counter()
+    print(f"FLVER import completed in {time_end - time_start:.2f}s")
+
+
+def import_flvers(file_paths, z_up=True, connect_bones=False, parallel=False, cache=None,
+                  all_vertex_groups=False, profile=None, import_lods=False,
+                  weld_distance=None, custom_normals=True, binder_pattern="*.flver"):
+    """
+    Import several FLVER files into Blender.
+
+    Binders such as .chrbnd and .partsbnd files are not unpacked; the FLVER
+    entries matching binder_pattern are read from them directly.
+
+    Args:
+        file_paths (list): Paths to the .flver files and binders.
+        z_up (bool): If True, convert to Blender's Z-up coordinate system.
+                     If False, keep FromSoftware's Y-up coordinate system.
+        parallel (bool): If True, parse and inflate the files in worker
+                         processes. Each model is built on the main thread as
+                         soon as its data arrives, in completion order.
+        cache (MeshCache): If given, reuse the parsed data of unchanged files
+                           and store the data of newly parsed ones.
+        all_vertex_groups (bool): If True, create a vertex group for every bone
+                                  on every mesh, not only the weighted ones.
+        profile (ImportProfile): If given, stage timings and counters of every
+                                 file are recorded in it.
+        import_lods (bool): If True, also import LOD and motion blur index
+                            buffers as separate meshes.
+        weld_distance (float): If given, merge vertices of a mesh whose
+                               positions snap to the same point of a grid
+                               with this spacing and that share their bone
+                               weights.
+        custom_normals (bool): If True, use the normals stored in the file as
+                               custom split normals.
+        binder_pattern (str): fnmatch style pattern of the binder entries to
+                              import, matched against their file names.
+    """
+    if profile is None:
+        profile = ImportProfile(enabled=False)
+    file_paths = [Path(file_path) for file_path in file_paths]
+    with profile.capture():
+        if not parallel or len(file_paths) < 2:
+            for file_path in file_paths:
+                if not binder.is_binder_name(file_path.name):
+                    import_flver(file_path, z_up=z_up, connect_bones=connect_bones, cache=cache,
+                                 all_vertex_groups=all_vertex_groups, profile=profile,
+                                 import_lods=import_lods, weld_distance=weld_distance,
+                                 custom_normals=custom_normals)
+                    continue
+                # All entries are read from one parse of the binder
+                binder_data = binder.read_binder(file_path)
+                for entry_name in get_binder_entries(binder_data, file_path, binder_pattern):
+                    import_flver(file_path, z_up=z_up, connect_bones=connect_bones, cache=cache,
+                                 all_vertex_groups=all_vertex_groups, profile=profile,
+                                 import_lods=import_lods, weld_distance=weld_distance,
+                                 custom_normals=custom_normals, entry_name=entry_name,
+                                 binder_data=binder_data)
+            return
+
+        time_start = time.perf_counter()
+        flver_count = 0
+
+        # Build cached files right away and only send the others to the
+        # workers, one task per file. The file table of a binder is read here
+        # to look up its entries in the cache; its uncached entries are then
+        # loaded together in one task, which reads the binder once.
+        groups = []
+        for file_path in file_paths:
+            entry_names = [None]
+            if binder.is_binder_name(file_path.name):
+                entry_names = get_binder_entries(
+                    binder.read_binder(file_path), file_path, binder_pattern)
+            uncached_entries = []
+            for entry_name in entry_names:
+                flver_count += 1
+                loaded = None
+                if cache is not None:
+                    loaded = cache.get(file_path, {"include_lods": import_lods,
+                                                   "entry_name": entry_name})
+                if loaded is None:
+                    uncached_entries.append(entry_name)
+                    continue
+                source_name = get_source_name(file_path, entry_name)
+                print(f"Importing FLVER from {source_name} (cached)")
+                with profile.file(source_name, cached=True):
+                    build_flver(get_base_name(file_path, entry_name), *loaded, z_up,
+                                connect_bones, all_vertex_groups, profile, import_lods,
+                                weld_distance, custom_normals)
+            if uncached_entries:
+                groups.append((file_path, uncached_entries))
+
+        # Parse and inflate times are measured in the workers; the time spent
+        # waiting for them is not attributed to any file
+        for (file_path, entry_name), flver_data, inflated_meshes, timings in iter_load_flvers(
+                groups, include_lods=import_lods):
+            source_name = get_source_name(file_path, entry_name)
+            print(f"Importing FLVER from {source_name}")
+            with profile.file(source_name):
+                for stage, seconds in timings.items():
+                    profile.record(stage, seconds)
+                if cache is not None:
+                    with profile.stage("cache"):
+                        cache.put(file_path, flver_data, inflated_meshes,
+                                  {"include_lods": import_lods, "entry_name": entry_name})
+                build_flver(get_base_name(file_path, entry_name), flver_data, inflated_meshes,
+                            z_up, connect_bones, all_vertex_groups, profile, import_lods,
+                            weld_distance, custom_normals)
+
+        time_end = time.perf_counter()
+        print(f"Imported {flver_count} FLVER files in {time_end - time_start:.2f}s")
+
+
+def get_binder_entries(binder_data, file_path, binder_pattern="*.flver"):
+    """
+    Names of the binder entries to import.
+
+    Args:
+        binder_data (Binder): The parsed binder.
+        file_path (Path): Path to the binder, for the warning if nothing matches.
+        binder_pattern (str): fnmatch style pattern of the binder entries to
+                              import, matched against their file names.
+
+    Returns:
+        list: Full names of the matching entries.
+    """
+    entries = binder_data.find(binder_pattern)
+    if not entries:
+        print(f"Warning: no entries matching {binder_pattern} in {file_path}")
+    return [entry.name for entry in entries]
+
+
+def get_source_name(file_path, entry_name=None):
+    """
+    Display name of a FLVER file, e.g. "c1234.chrbnd.dcx:c1234.flver" for a
+    binder entry.
+
+    Args:
+        file_path (Path): Path to the .flver file, or to the binder holding it.
+        entry_name (str): Name of the entry in the binder, if any.
+    """
+    if entry_name is None:
+        return str(file_path)
+    return f"{file_path}:{PureWindowsPath(entry_name).name}"
+
+
+def get_base_name(file_path, entry_name=None):
+    """
+    Name of a model without its extensions, e.g. "c1234" for "c1234.flver.dcx".
+
+    Args:
+        file_path (Path): Path to the .flver or .flver.dcx file.
+        entry_name (str): If given, the name is taken from this binder entry
+                          instead, whose directories use backslashes.
+    """
+    name = file_path.name if entry_name is None else PureWindowsPath(entry_name).name
+    for suffix in (".dcx", ".flver"):
+        if name.lower().endswith(suffix):
+            name = name[:-len(suffix)]
+    return name
+
 
-    base_name = file_path.stem
+def build_flver(base_name, flver_data, inflated_meshes, z_up, connect_bones=False,
+                all_vertex_groups=False, profile=None, import_lods=False,
+                weld_distance=None, custom_normals=True):
+    """
+    Create the collection, armature and meshes of a parsed FLVER file.
 
-    # Read FLVER data
-    flver_data = read_flver(file_path)
-    inflated_meshes = flver_data.inflate()
+    Args:
+        base_name (str): Name of the collection and prefix of object names.
+        flver_data (Flver): Parsed FLVER data.
+        inflated_meshes (list): Result of flver_data.inflate().
+        z_up (bool): If True, convert to Z-up coordinate system.
+        all_vertex_groups (bool): If True, create a vertex group for every bone
+                                  on every mesh, not only the weighted ones.
+        profile (ImportProfile): If given, stage timings and counters are
+                                 recorded in it.
+        import_lods (bool): If True, the LODs of every mesh are created as
+                            meshes in a child collection per LOD level, which
+                            is excluded from the view layer so it can be used
+                            with collection instances.
+        weld_distance (float): If given, merge vertices of a mesh whose
+                               positions snap to the same point of a grid
+                               with this spacing and that share their bone
+                               weights.
+        custom_normals (bool): If True, use the normals stored in the file as
+                               custom split normals.
+    """
+    if profile is None:
+        profile = ImportProfile(enabled=False)
 
     # Create collection for this model
     collection = bpy.data.collections.new(base_name)
@@ -35,11 +274,15 @@ def import_flver(file_path, z_up=True, connect_bones=False):
     # Create armature only if there are bones
     armature = None
     if len(flver_data.bones) > 0:
-        armature = create_armature(base_name, collection, flver_data, z_up, connect_bones)
+        with profile.stage("armature"):
+            armature = create_armature(base_name, collection, flver_data, z_up, connect_bones)
+        profile.count("bones", len(flver_data.bones))
 
     # Create meshes
+    lod_collections = {}
     for flver_mesh, inflated_mesh in zip(flver_data.meshes, inflated_meshes):
         if inflated_mesh is None:
+            profile.count("skipped_meshes")
             continue
 
         create_mesh(
@@ -49,41 +292,189 @@ def import_flver(file_path, z_up=True, connect_bones=False):
             flver_mesh,
             inflated_mesh,
             armature,
-            z_up
+            z_up,
+            all_vertex_groups,
+            profile,
+            weld_distance=weld_distance,
+            custom_normals=custom_normals
         )
 
-    time_end = time.perf_counter()
-    print(f"FLVER import completed in {time_end - time_start:.2f}s")
+        if not import_lods:
+            continue
 
+        # LOD meshes reuse the decoded vertex data of the full detail mesh
+        for lod in inflated_mesh.lods:
+            lod_name = get_lod_name(lod.detail_flags)
+            if lod_name not in lod_collections:
+                lod_collection = bpy.data.collections.new(f"{base_name}_{lod_name}")
+                collection.children.link(lod_collection)
+                exclude_from_view_layer(lod_collection)
+                lod_collections[lod_name] = lod_collection
+
+            create_mesh(
+                base_name,
+                lod_collections[lod_name],
+                flver_data,
+                flver_mesh,
+                inflated_mesh.lod_mesh(lod),
+                armature,
+                z_up,
+                all_vertex_groups,
+                profile,
+                name_suffix=f"_{lod_name}",
+                weld_distance=weld_distance,
+                custom_normals=custom_normals
+            )
+            profile.count("lod_meshes")
+
+
+def get_lod_name(detail_flags):
+    """
+    Name of a LOD level, e.g. "LOD1" or "MotionBlur".
 
-def convert_coordinates(x, y, z, z_up):
-    """Convert coordinates based on coordinate system setting."""
-    if z_up:
-        return (x, z, y)  # Swap Y and Z for Blender's Z-up
-    else:
-        return (x, y, z)  # Keep original Y-up
+    Args:
+        detail_flags (set): Detail flags of the LOD's index buffer.
+    """
+    names = {
+        IndexBuffer.DetailFlags.LOD_LEVEL1: "LOD1",
+        IndexBuffer.DetailFlags.LOD_LEVEL2: "LOD2",
+        IndexBuffer.DetailFlags.MOTION_BLUR: "MotionBlur",
+    }
+    return "_".join(names[flag] for flag in IndexBuffer.DetailFlags if flag in detail_flags)
 
 
-def create_mesh(base_name, collection, flver_data, flver_mesh, inflated_mesh, armature, z_up):
+def exclude_from_view_layer(collection):
     """
-    Create a Blender mesh from inflated FLVER mesh data.
+    Exclude a collection from the active view layer.
+
+    Args:
+        collection (Collection): Collection linked somewhere in the scene.
     """
-    material_name = flver_data.materials[flver_mesh.material_index].name
-    mesh_name = f"{base_name}_{material_name}"
+    layer_collections = [bpy.context.view_layer.layer_collection]
+    while layer_collections:
+        layer_collection = layer_collections.pop()
+        if layer_collection.collection == collection:
+            layer_collection.exclude = True
+            return
+        layer_collections.extend(layer_collection.children)
 
-    # Create vertices with coordinate conversion
-    verts = [
-        Vector(convert_coordinates(v[0], v[1], v[2], z_up))
-        for v in inflated_mesh.vertices.positions
-    ]
 
-    # Create mesh
-    mesh = bpy.data.meshes.new(name=mesh_name)
-    mesh.from_pydata(verts, [], inflated_mesh.faces)
+def create_mesh(base_name, collection, flver_data, flver_mesh, inflated_mesh, armature, z_up,
+                all_vertex_groups=False, profile=None, name_suffix="", weld_distance=None,
+                custom_normals=True):
+    """
+    Create a Blender mesh from inflated FLVER mesh data.
+
+    Geometry, UVs, vertex colors and smooth shading are written with
+    foreach_set from flat arrays instead of going through from_pydata and
+    bmesh, and the file's normals are applied as custom split normals. With
+    a weld_distance, duplicated vertices are merged first; UVs, colors and
+    normals stay per loop, so seams and hard edges are kept while the
+    geometry is connected.
+    """
+    if profile is None:
+        profile = ImportProfile(enabled=False)
 
-    # Create object and link to collection
-    obj = bpy.data.objects.new(mesh_name, mesh)
-    collection.objects.link(obj)
+    material_name = flver_data.materials[flver_mesh.material_index].name
+    mesh_name = f"{base_name}_{material_name}{name_suffix}"
+
+    vertices = inflated_mesh.vertices
+    faces = inflated_mesh.faces
+    # Vertex of every loop in the inflated mesh, to look up per-loop attributes
+    loop_source_indices = faces.ravel()
+
+    if weld_distance is not None:
+        with profile.stage("weld"):
+            kept, vertex_map = inflated_mesh.weld_map(weld_distance)
+            welded_faces = vertex_map[faces]
+            # Drop faces that collapsed because two of their corners merged
+            valid = ((welded_faces[:, 0] != welded_faces[:, 1]) &
+                     (welded_faces[:, 1] != welded_faces[:, 2]) &
+                     (welded_faces[:, 2] != welded_faces[:, 0]))
+            faces = welded_faces[valid]
+            loop_source_indices = inflated_mesh.faces[valid].ravel()
+            vertices = vertices.take(kept)
+        profile.count("welded_vertices", len(vertex_map) - len(kept))
+
+    loop_vertex_indices = faces.ravel()
+    profile.count("meshes")
+    profile.count("vertices", len(vertices.positions))
+    profile.count("faces", len(faces))
+
+    with profile.stage("mesh"):
+        # Convert coordinates for all vertices at once
+        positions = vertices.positions
+        if z_up:
+            positions = positions[:, (0, 2, 1)]  # Swap Y and Z for Blender's Z-up
+
+        # Create mesh
+        mesh = bpy.data.meshes.new(name=mesh_name)
+        mesh.vertices.add(len(positions))
+        mesh.vertices.foreach_set("co", positions.astype(np.float32).ravel())
+        mesh.loops.add(len(loop_vertex_indices))
+        mesh.loops.foreach_set("vertex_index",
+                               loop_vertex_indices.astype(np.int32))
+        mesh.polygons.add(len(faces))
+        mesh.polygons.foreach_set(
+            "loop_start", np.arange(0, len(loop_vertex_indices), 3, dtype=np.int32))
+        mesh.polygons.foreach_set("use_smooth", np.ones(len(faces), dtype=bool))
+
+    # Create a UV layer per UV set, looking up every loop's UV by its original
+    # vertex index
+    with profile.stage("uv"):
+        vertex_count = len(inflated_mesh.vertices.positions)
+        uv_sets = []
+        for uv_set, uv in enumerate(inflated_mesh.vertices.uvs):
+            if len(uv) != vertex_count:
+                print(f"Warning: skipping UV set {uv_set} of {mesh_name} with {len(uv)} "
+                      f"coordinates for {vertex_count} vertices")
+                continue
+            uv_sets.append(uv)
+        if len(uv_sets) > MAX_UV_LAYERS:
+            print(f"Warning: {mesh_name} has {len(uv_sets)} UV sets, "
+                  f"only the first {MAX_UV_LAYERS} are imported")
+        for uv_set, uv in enumerate(uv_sets[:MAX_UV_LAYERS]):
+            loop_uvs = uv[loop_source_indices]
+            loop_uvs[:, 1] = 1.0 - loop_uvs[:, 1]
+            uv_layer = mesh.uv_layers.new(
+                name="UVMap" if uv_set == 0 else f"UVMap.{uv_set:03d}")
+            uv_layer.data.foreach_set("uv", loop_uvs.ravel())
+        profile.count("uv_layers", min(len(uv_sets), MAX_UV_LAYERS))
+
+    # Create color attribute, per loop if vertices were merged
+    with profile.stage("colors"):
+        colors = inflated_mesh.vertices.colors
+        if len(colors) > 0 and len(colors) == len(inflated_mesh.vertices.positions):
+            domain = "POINT"
+            if weld_distance is not None:
+                colors = colors[loop_source_indices]
+                domain = "CORNER"
+            color_attribute = mesh.color_attributes.new(
+                name="Color", type="FLOAT_COLOR", domain=domain)
+            color_attribute.data.foreach_set("color", colors.ravel())
+            mesh.color_attributes.active_color = color_attribute
+
+    with profile.stage("mesh"):
+        mesh.update(calc_edges=True)
+
+    # Set custom normals, per loop if vertices were merged
+    with profile.stage("normals"):
+        normals = inflated_mesh.vertices.normals
+        if (custom_normals and len(normals) > 0
+                and len(normals) == len(inflated_mesh.vertices.positions)):
+            if z_up:
+                normals = normals[:, (0, 2, 1)]  # Swap Y and Z for Blender's Z-up
+            lengths = np.linalg.norm(normals, axis=1, keepdims=True)
+            normals = normals / np.where(lengths > 0.0, lengths, 1.0)
+            if weld_distance is None:
+                mesh.normals_split_custom_set_from_vertices(normals)
+            else:
+                mesh.normals_split_custom_set(normals[loop_source_indices])
+
+    with profile.stage("mesh"):
+        # Create object and link to collection
+        obj = bpy.data.objects.new(mesh_name, mesh)
+        collection.objects.link(obj)
 
     # Setup armature modifier (only if armature exists)
     if armature is not None:
@@ -91,153 +482,244 @@ def create_mesh(base_name, collection, flver_data, flver_mesh, inflated_mesh, ar
             "Armature")).object = armature
         obj.parent = armature
 
-        # Create vertex groups for ALL bones in skeleton
+        # Bone indices are global indices into the skeleton
         # (Elden Ring Nightreign vertex buffer uses global bone indices directly)
-        for bone in flver_data.bones:
-            obj.vertex_groups.new(name=bone.name)
-
-    # Use bmesh for UVs and bone weights
-    bm = bmesh.new()
-    bm.from_mesh(mesh)
-
-    # Create UV layer
-    uv_layer = bm.loops.layers.uv.new()
-    for face in bm.faces:
-        for loop in face.loops:
-            u, v = inflated_mesh.vertices.uv[loop.vert.index][:2]
-            loop[uv_layer].uv = (u, 1.0 - v)
-        face.smooth = True
-
-    # Apply bone weights (only if armature exists)
-    if armature is not None:
-        weight_layer = bm.verts.layers.deform.new()
-        num_bones = len(flver_data.bones)
-
-        for vert in bm.verts:
-            try:
-                weights = inflated_mesh.vertices.bone_weights[vert.index]
-                indices = inflated_mesh.vertices.bone_indices[vert.index]
-
-                for index, weight in zip(indices, weights):
-                    if weight != 0.0:
-                        bone_idx = int(index)
-                        if 0 <= bone_idx < num_bones:
-                            vert[weight_layer][bone_idx] = weight
-            except IndexError:
-                continue
+        with profile.stage("weights"):
+            assign_bone_weights(obj, flver_data.bones, vertices, len(positions),
+                                all_vertex_groups)
 
-    bm.to_mesh(mesh)
-    bm.free()
-    mesh.update()
 
+def assign_bone_weights(obj, bones, vertices, vertex_count, all_vertex_groups=False):
+    """
+    Create vertex groups and assign bone weights in bulk.
 
-def get_rotation_matrix(bone):
-    """Get rotation matrix from bone's rotation (Y, Z, X order)."""
-    return (
-        Matrix.Rotation(bone.rotation[1], 4, 'Y') @
-        Matrix.Rotation(bone.rotation[2], 4, 'Z') @
-        Matrix.Rotation(bone.rotation[0], 4, 'X')
-    )
-
+    Vertices are grouped by (bone, weight) so that every group receives one
+    VertexGroup.add call per distinct weight instead of one per vertex.
 
-def create_armature(name, collection, flver_data, z_up, connect_bones=False):
+    Args:
+        obj (Object): Mesh object to add the vertex groups to.
+        bones (list): FLVER bones of the skeleton.
+        vertices (InflatedMesh.Vertices): Vertex data with bone weights and indices.
+        vertex_count (int): Number of vertices in the mesh.
+        all_vertex_groups (bool): If True, create a vertex group for every bone
+                                  in the skeleton, not only the weighted ones.
     """
-    Create a Blender armature from FLVER bone data.
+    bone_count = len(bones)
+    rows = min(vertex_count, len(vertices.bone_weights), len(vertices.bone_indices))
+    weights = vertices.bone_weights[:rows]
+    vertex_indices = np.repeat(np.arange(rows), weights.shape[1])
+    bone_indices = vertices.bone_indices[:rows].ravel().astype(np.int64)
+    weights = weights.ravel()
+
+    used = (weights != 0.0) & (bone_indices < bone_count)
+    vertex_indices = vertex_indices[used]
+    bone_indices = bone_indices[used]
+    weights = weights[used]
+
+    # A vertex may list the same bone more than once; the last entry wins
+    keys = (vertex_indices * bone_count + bone_indices)[::-1]
+    _, last_entries = np.unique(keys, return_index=True)
+    last_entries = len(keys) - 1 - last_entries
+    vertex_indices = vertex_indices[last_entries]
+    bone_indices = bone_indices[last_entries]
+    weights = weights[last_entries]
+
+    if all_vertex_groups:
+        group_bone_indices = range(bone_count)
+    else:
+        group_bone_indices = np.unique(bone_indices).tolist()
+    vertex_groups = {
+        bone_index: obj.vertex_groups.new(name=bones[bone_index].name)
+        for bone_index in group_bone_indices
+    }
+    if len(weights) == 0:
+        return
+
+    # Split into runs of equal (bone, weight)
+    order = np.lexsort((weights, bone_indices))
+    vertex_indices = vertex_indices[order]
+    bone_indices = bone_indices[order]
+    weights = weights[order]
+    starts = np.flatnonzero((np.diff(bone_indices) != 0) | (np.diff(weights) != 0)) + 1
+    starts = np.concatenate(([0], starts))
+    ends = np.concatenate((starts[1:], [len(weights)]))
+    for start, end in zip(starts.tolist(), ends.tolist()):
+        vertex_groups[int(bone_indices[start])].add(
+            vertex_indices[start:end].tolist(), float(weights[start]), "REPLACE")
+
+
+def compute_bone_heads_tails(flver_data, z_up):
+    """
+    Compute the head and tail of every bone from the FLVER bone hierarchy.
+
+    Tails are placeholders along each bone's local Y axis; orient_bone_tails
+    replaces them with the geometric orientation.
 
     Args:
-        name (str): Base name for the armature.
-        collection (Collection): Blender collection to place the armature in.
         flver_data (Flver): FLVER data containing bone information.
         z_up (bool): If True, convert to Z-up coordinate system.
 
     Returns:
-        Object: The armature object, or None if no bones.
+        tuple: (heads, tails, parent_indices).
     """
-    if len(flver_data.bones) == 0:
-        return None
-
-    armature = bpy.data.objects.new(name, bpy.data.armatures.new(name))
-    collection.objects.link(armature)
-    armature.data.display_type = "OCTAHEDRAL"
-    armature.show_in_front = True
+    world_matrices = flver_data.bone_world_matrices()
 
-    bpy.context.view_layer.objects.active = armature
-    bpy.ops.object.editmode_toggle()
-
-    # Create all edit bones first
-    root_bones = []
-    for f_bone in flver_data.bones:
-        bone = armature.data.edit_bones.new(f_bone.name)
-        if f_bone.parent_index < 0:
-            root_bones.append(bone)
-
-    # Process bones using parent chain traversal to set head positions and hierarchy
-    def transform_bone(bone_index, parent_matrix):
-        if bone_index < 0 or bone_index >= len(flver_data.bones):
-            return
+    # Head position from the world matrix; tail is a placeholder (overridden by geometric pass)
+    heads = world_matrices[:, :3, 3]
+    tails = heads + world_matrices[:, :3, 1] * 0.05
 
-        flver_bone = flver_data.bones[bone_index]
-        edit_bone = armature.data.edit_bones[bone_index]
+    if z_up:
+        heads = heads[:, (0, 2, 1)]  # Swap Y and Z for Blender's Z-up
+        tails = tails[:, (0, 2, 1)]
+    return heads, tails, flver_data.bone_parent_indices()
 
-        # Set parent if valid
-        if 0 <= flver_bone.parent_index < len(flver_data.bones):
-            edit_bone.parent = armature.data.edit_bones[flver_bone.parent_index]
 
-        # Compute accumulated world-space matrix for this bone
-        translation_vector = Vector(flver_bone.translation)
-        child_matrix = parent_matrix @ Matrix.Translation(translation_vector) @ get_rotation_matrix(flver_bone)
+def orient_bone_tails(heads, tails, parent_indices):
+    """
+    Geometric bone orientation (mirrors blender_bone_util auto bone orientation).
 
-        # Head position from parent matrix; tail is a placeholder (overridden by geometric pass)
-        head = parent_matrix @ translation_vector
-        tail = head + child_matrix.to_3x3() @ Vector((0, 0.05, 0))
+    Non-leaf bones point toward the average head of their children, and leaf
+    bones inherit the direction of their parent. Bone lengths are kept.
 
-        edit_bone.head = convert_coordinates(head[0], head[1], head[2], z_up)
-        edit_bone.tail = convert_coordinates(tail[0], tail[1], tail[2], z_up)
+    Args:
+        heads (ndarray): (N, 3) bone heads.
+        tails (ndarray): (N, 3) placeholder bone tails.
+        parent_indices (ndarray): Parent of every bone, or -1.
 
-        # Process child and sibling
-        if flver_bone.child_index >= 0 and flver_bone.child_index < len(flver_data.bones):
-            transform_bone(flver_bone.child_index, child_matrix)
-        if flver_bone.next_sibling_index >= 0 and flver_bone.next_sibling_index < len(flver_data.bones):
-            transform_bone(flver_bone.next_sibling_index, parent_matrix)
+    Returns:
+        ndarray: (N, 3) oriented bone tails.
+    """
+    tails = tails.copy()
+    bone_lengths = np.linalg.norm(tails - heads, axis=1)
+    bone_lengths[bone_lengths == 0.0] = 0.05
 
-    if len(flver_data.bones) > 0:
-        transform_bone(0, Matrix())
+    has_parent = parent_indices >= 0
+    children = np.flatnonzero(has_parent)
+    child_counts = np.bincount(parent_indices[children], minlength=len(heads))
 
-    # Geometric bone orientation (mirrors blender_bone_util auto bone orientation):
     # Step 1 — redirect non-leaf bone tails toward average child head
-    for edit_bone in armature.data.edit_bones:
-        children = edit_bone.children
-        if not children:
-            continue
-        avg_child_head = sum((c.head for c in children), Vector((0.0, 0.0, 0.0))) / len(children)
-        direction = avg_child_head - edit_bone.head
-        if direction.length > 1e-6:
-            bone_len = (edit_bone.tail - edit_bone.head).length or 0.05
-            edit_bone.tail = edit_bone.head + direction.normalized() * bone_len
+    child_head_sums = np.zeros_like(heads)
+    np.add.at(child_head_sums, parent_indices[children], heads[children])
+    non_leaf = child_counts > 0
+    directions = np.zeros_like(heads)
+    directions[non_leaf] = (child_head_sums[non_leaf] / child_counts[non_leaf, None]
+                            - heads[non_leaf])
+    _set_tails_along(tails, heads, directions, bone_lengths, non_leaf)
 
     # Step 2 — leaf bones inherit parent direction
-    for edit_bone in armature.data.edit_bones:
-        if edit_bone.children or not edit_bone.parent:
-            continue
-        parent_dir = edit_bone.parent.tail - edit_bone.parent.head
-        if parent_dir.length > 1e-6:
-            bone_len = (edit_bone.tail - edit_bone.head).length or 0.05
-            edit_bone.tail = edit_bone.head + parent_dir.normalized() * bone_len
+    leaf = has_parent & ~non_leaf
+    parents = parent_indices[leaf]
+    directions = np.zeros_like(heads)
+    directions[leaf] = tails[parents] - heads[parents]
+    _set_tails_along(tails, heads, directions, bone_lengths, leaf)
 
-    # Step 3 — align all rolls so local Z faces global +Z
-    for eb in armature.data.edit_bones:
-        eb.select = True
-    bpy.ops.armature.calculate_roll(type='GLOBAL_POS_Z')
+    return tails
+
+
+def _set_tails_along(tails, heads, directions, bone_lengths, mask):
+    direction_lengths = np.linalg.norm(directions, axis=1)
+    mask = mask & (direction_lengths > 1e-6)
+    tails[mask] = heads[mask] + (directions[mask] / direction_lengths[mask, None]
+                                 * bone_lengths[mask, None])
+
+
+def compute_bone_rolls(heads, tails):
+    """
+    Compute rolls so that every bone's local Z axis faces global +Z.
+
+    This is the same result as bpy.ops.armature.calculate_roll with
+    type='GLOBAL_POS_Z', without needing an operator context.
+
+    Args:
+        heads (ndarray): (N, 3) bone heads.
+        tails (ndarray): (N, 3) bone tails.
+
+    Returns:
+        ndarray: (N,) bone rolls in radians.
+    """
+    directions = tails - heads
+    lengths = np.linalg.norm(directions, axis=1)
+    valid = lengths > np.finfo(np.float32).eps
+    directions = directions / np.where(valid, lengths, 1.0)[:, None]
+    x, y, z = directions.T
+    # Bones (nearly) parallel to Z keep a zero roll
+    valid &= np.abs(z) < 1.0 - np.finfo(np.float32).eps
+
+    # Z axis of the bone matrix at zero roll (see vec_roll_to_mat3_normalized)
+    theta = 1.0 + y
+    theta_alt = x * x + z * z
+    near_negative_y = theta <= 6.1e-3
+    theta = np.where(near_negative_y, theta_alt * 0.5 + theta_alt * theta_alt * 0.125, theta)
+    theta[theta == 0.0] = 1.0
+    z_axes = np.stack((-x * z / theta, -z, 1.0 - z * z / theta), axis=1)
+    on_negative_y = near_negative_y & (theta_alt <= 2.5e-4 * 2.5e-4)
+    z_axes[on_negative_y] = (0.0, 0.0, 1.0)
+
+    # Signed angle between that axis and +Z projected onto the bone's normal plane
+    targets = -directions * z[:, None]
+    targets[:, 2] += 1.0
+    crosses = np.cross(z_axes, targets)
+    rolls = np.arctan2(np.linalg.norm(crosses, axis=1), np.einsum("ij,ij->i", z_axes, targets))
+    rolls = np.where(np.einsum("ij,ij->i", crosses, directions) < 0.0, -rolls, rolls)
+    rolls[~valid] = 0.0
+    return rolls
+
+
+def create_armature(name, collection, flver_data, z_up, connect_bones=False):
+    """
+    Create a Blender armature from FLVER bone data.
+
+    Bone heads, tails and rolls are computed up front, then written in a
+    single edit mode session.
+
+    Args:
+        name (str): Base name for the armature.
+        collection (Collection): Blender collection to place the armature in.
+        flver_data (Flver): FLVER data containing bone information.
+        z_up (bool): If True, convert to Z-up coordinate system.
+
+    Returns:
+        Object: The armature object, or None if no bones.
+    """
+    if len(flver_data.bones) == 0:
+        return None
+
+    heads, tails, parent_indices = compute_bone_heads_tails(flver_data, z_up)
+    tails = orient_bone_tails(heads, tails, parent_indices)
+    rolls = compute_bone_rolls(heads, tails)
 
     # Optional: snap single-child bone tails to child head and set use_connect
+    connected = np.zeros(len(heads), dtype=bool)
     if connect_bones:
-        for edit_bone in armature.data.edit_bones:
-            children = edit_bone.children
-            if len(children) != 1:
-                continue
-            child = children[0]
-            edit_bone.tail = child.head
-            child.use_connect = True
+        children = np.flatnonzero(parent_indices >= 0)
+        child_counts = np.bincount(parent_indices[children], minlength=len(heads))
+        only_children = children[child_counts[parent_indices[children]] == 1]
+        tails[parent_indices[only_children]] = heads[only_children]
+        connected[only_children] = True
 
-    bpy.ops.object.editmode_toggle()
+    armature = bpy.data.objects.new(name, bpy.data.armatures.new(name))
+    collection.objects.link(armature)
+    armature.data.display_type = "OCTAHEDRAL"
+    armature.show_in_front = True
+
+    bpy.context.view_layer.objects.active = armature
+    bpy.ops.object.mode_set(mode='EDIT')
+
+    edit_bones = [
+        armature.data.edit_bones.new(f_bone.name) for f_bone in flver_data.bones
+    ]
+    for edit_bone, head, tail, roll in zip(edit_bones, heads.tolist(),
+                                           tails.tolist(), rolls.tolist()):
+        edit_bone.head = head
+        edit_bone.tail = tail
+        edit_bone.roll = roll
+
+    # Parent after all bones are placed, as connecting moves the child's head
+    for edit_bone, parent_index, use_connect in zip(
+            edit_bones, parent_indices.tolist(), connected.tolist()):
+        if parent_index >= 0:
+            edit_bone.parent = edit_bones[parent_index]
+            edit_bone.use_connect = use_connect
+
+    bpy.ops.object.mode_set(mode='OBJECT')
     return armature
@@ -0,0 +1,146 @@
+import concurrent.futures
+import multiprocessing
+import os
+import time
+from concurrent.futures.process import BrokenProcessPool
+
+from . import binder
+from .flver_utils import read_flver
+
+# Worker processes run a plain Python interpreter without bpy, so the add-on
+# package cannot be imported there (its __init__ registers the operator).
+# This snippet registers empty package modules for the add-on and its parent
+# packages instead, so the parsing modules can be imported under the same
+# names as in Blender and pickled results resolve to the same classes. It is
+# passed to exec as the pool initializer, because a function defined in this
+# package could not be unpickled before the package exists.
+_WORKER_BOOTSTRAP = """
+import importlib.machinery
+import importlib.util
+import sys
+
+parts = package.split(".")
+for i in range(1, len(parts) + 1):
+    name = ".".join(parts[:i])
+    if name in sys.modules:
+        continue
+    spec = importlib.machinery.ModuleSpec(name, None, is_package=True)
+    spec.submodule_search_locations = [path] if i == len(parts) else []
+    sys.modules[name] = importlib.util.module_from_spec(spec)
+"""
+
+
+def load_flver(source, timings=None, include_lods=False):
+    """
+    Read and inflate a FLVER file, returning data that can be sent across
+    processes.
+
+    Args:
+        source: Path to the .flver file, or its data, e.g. a binder entry.
+        timings (dict): If given, the seconds spent in the "parse" and
+                        "inflate" stages are stored in it.
+        include_lods (bool): If True, also inflate LOD and motion blur index
+                             buffers.
+
+    Returns:
+        tuple: The Flver with its buffers released, and its inflated meshes.
+    """
+    time_start = time.perf_counter()
+    flver_data = read_flver(source)
+    time_parsed = time.perf_counter()
+    inflated_meshes = flver_data.inflate(include_lods)
+    flver_data.release_buffers()
+    if timings is not None:
+        timings["parse"] = time_parsed - time_start
+        timings["inflate"] = time.perf_counter() - time_parsed
+    return flver_data, inflated_meshes
+
+
+# Loads a loose file, or the given entries of a binder, which is read and
+# decompressed once for all of them. The time spent reading the binder is
+# split evenly over its entries.
+def _load_flvers_timed(group, include_lods=False):
+    file_path, entry_names = group
+    if entry_names == [None]:
+        timings = {}
+        flver_data, inflated_meshes = load_flver(file_path, timings, include_lods)
+        return [(None, flver_data, inflated_meshes, timings)]
+
+    time_start = time.perf_counter()
+    binder_data = binder.read_binder(file_path)
+    binder_time = (time.perf_counter() - time_start) / len(entry_names)
+    results = []
+    for entry_name in entry_names:
+        timings = {"binder": binder_time}
+        flver_data, inflated_meshes = load_flver(
+            binder_data.read(entry_name), timings, include_lods)
+        results.append((entry_name, flver_data, inflated_meshes, timings))
+    return results
+
+
+def iter_load_flvers(groups, max_workers=None, include_lods=False):
+    """
+    Load FLVER files in a process pool, yielding them as they finish.
+
+    If the pool cannot be started or breaks, the files that have not been
+    yielded yet are loaded in this process instead.
+
+    Args:
+        groups (list): (file_path, entry_names) pairs, where entry_names is
+                       [None] for a loose .flver file, or the names of the
+                       entries to load from the binder at file_path. Each
+                       pair is one task, so a binder is only read once.
+        max_workers (int): Number of worker processes. Defaults to the number
+                           of CPUs, capped at the number of files.
+        include_lods (bool): If True, also inflate LOD and motion blur index
+                             buffers.
+
+    Yields:
+        tuple: ((file_path, entry_name), flver_data, inflated_meshes, timings)
+               in completion order, where timings holds the parse and inflate
+               times.
+    """
+    pending = list(groups)
+    # Nothing to load, e.g. when every file was found in the cache
+    if not pending:
+        return
+    if max_workers is None:
+        max_workers = min(len(pending), os.cpu_count() or 1)
+
+    try:
+        executor = concurrent.futures.ProcessPoolExecutor(
+            max_workers=max_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=exec,
+            initargs=(_WORKER_BOOTSTRAP, {
+                "package": __package__,
+                "path": os.path.dirname(os.path.abspath(__file__)),
+            }),
+        )
+    except (OSError, ValueError) as error:
+        print(f"Warning: could not start worker processes ({error})")
+        executor = None
+
+    if executor is not None:
+        try:
+            futures = {
+                executor.submit(_load_flvers_timed, group, include_lods): group
+                for group in pending
+            }
+            for future in concurrent.futures.as_completed(futures):
+                group = futures[future]
+                results = future.result()
+                pending.remove(group)
+                for entry_name, flver_data, inflated_meshes, timings in results:
+                    yield (group[0], entry_name), flver_data, inflated_meshes, timings
+        except BrokenProcessPool as error:
+            print(f"Warning: worker processes failed ({error}), "
+                  "loading remaining files in this process")
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    for group in list(pending):
+        results = _load_flvers_timed(group, include_lods)
+        pending.remove(group)
+        for entry_name, flver_data, inflated_meshes, timings in results:
+            yield (group[0], entry_name), flver_data, inflated_meshes, timings
@@ -0,0 +1,177 @@
+import cProfile
+import contextlib
+import io
+import json
+import pstats
+import time
+from datetime import datetime
+from pathlib import Path
+
+# Number of functions listed in the cProfile section of a report
+CPROFILE_TOP_FUNCTIONS = 40
+
+
+class ImportProfile:
+    """
+    Stage timings and counters for a batch of imported FLVER files.
+
+    Every file gets a record with the time spent in each stage (parse,
+    inflate, armature, mesh, uv, weights, ...) and counters such as the
+    number of vertices, faces and bones. Stages that run more than once per
+    file, like mesh construction, accumulate. A disabled profile accepts the
+    same calls and records nothing, so callers never need to check for it.
+
+    Args:
+        enabled (bool): If False, every call is a no-op.
+        use_cprofile (bool): If True, capture() also runs cProfile and the
+                             report lists the most expensive functions.
+    """
+
+    def __init__(self, enabled=True, use_cprofile=False):
+        self.enabled = enabled
+        self.files = []
+        self.total_time = 0.0
+        self.started = None
+        self._current = None
+        self._capturing = False
+        self._profiler = cProfile.Profile() if enabled and use_cprofile else None
+
+    @contextlib.contextmanager
+    def capture(self):
+        """Time the whole batch and run cProfile over it if requested."""
+        # Nested captures (import_flvers calling import_flver) are part of the outer one
+        if not self.enabled or self._capturing:
+            yield
+            return
+
+        if self.started is None:
+            self.started = datetime.now().isoformat(timespec="seconds")
+        if self._profiler is not None:
+            self._profiler.enable()
+        self._capturing = True
+        time_start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.total_time += time.perf_counter() - time_start
+            self._capturing = False
+            if self._profiler is not None:
+                self._profiler.disable()
+
+    @contextlib.contextmanager
+    def file(self, file_path, cached=False):
+        """Start the record of one file; stages and counters go to it."""
+        if not self.enabled:
+            yield
+            return
+
+        record = {
+            "file": str(file_path),
+            "cached": cached,
+            "total": 0.0,
+            "stages": {},
+            "counters": {},
+        }
+        self.files.append(record)
+        self._current = record
+        time_start = time.perf_counter()
+        try:
+            yield
+        finally:
+            record["total"] += time.perf_counter() - time_start
+            self._current = None
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        """Add the time spent in the block to a stage of the current file."""
+        if not self.enabled or self._current is None:
+            yield
+            return
+
+        time_start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - time_start)
+
+    def record(self, name, seconds):
+        """Add a time measured elsewhere, e.g. in a worker process."""
+        if not self.enabled or self._current is None:
+            return
+        stages = self._current["stages"]
+        stages[name] = stages.get(name, 0.0) + seconds
+
+    def count(self, name, amount=1):
+        """Add to a counter of the current file."""
+        if not self.enabled or self._current is None:
+            return
+        counters = self._current["counters"]
+        counters[name] = counters.get(name, 0) + int(amount)
+
+    def report(self):
+        """
+        Build the report of the batch.
+
+        Returns:
+            dict: JSON-serializable report with per-file records and totals.
+        """
+        stage_totals = {}
+        counter_totals = {}
+        for record in self.files:
+            for name, seconds in record["stages"].items():
+                stage_totals[name] = stage_totals.get(name, 0.0) + seconds
+            for name, amount in record["counters"].items():
+                counter_totals[name] = counter_totals.get(name, 0) + amount
+
+        report = {
+            "started": self.started,
+            "total": self.total_time,
+            "file_count": len(self.files),
+            "stage_totals": stage_totals,
+            "counter_totals": counter_totals,
+            "files": self.files,
+        }
+        if self._profiler is not None:
+            report["cprofile"] = self._cprofile_functions()
+        return report
+
+    def _cprofile_functions(self):
+        stats = pstats.Stats(self._profiler, stream=io.StringIO())
+        stats.sort_stats(pstats.SortKey.CUMULATIVE)
+        functions = []
+        for key in stats.fcn_list[:CPROFILE_TOP_FUNCTIONS]:
+            primitive_calls, calls, total_time, cumulative_time, _ = stats.stats[key]
+            file_name, line, function_name = key
+            functions.append({
+                "function": f"{file_name}:{line}({function_name})",
+                "calls": calls,
+                "primitive_calls": primitive_calls,
+                "total_time": total_time,
+                "cumulative_time": cumulative_time,
+            })
+        return functions
+
+    def write_report(self, directory):
+        """
+        Write the report as JSON, and the raw cProfile data next to it.
+
+        Args:
+            directory (Path): Directory to write the report to.
+
+        Returns:
+            Path: Path of the JSON report, or None if the profile is disabled.
+        """
+        if not self.enabled:
+            return None
+
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        name = "flver_import_" + datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+        report_path = directory / (name + ".json")
+        with open(report_path, "w", encoding="utf-8") as fp:
+            json.dump(self.report(), fp, indent=2)
+
+        # Raw data for pstats, snakeviz and similar tools
+        if self._profiler is not None:
+            self._profiler.dump_stats(directory / (name + ".prof"))
+        return report_path